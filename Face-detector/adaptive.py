@@ -0,0 +1,181 @@
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+from detection import detect_faces
+from detectors import CascadePairDetector, FaceDetector
+from tracking import CASCADE_WINDOW, scaled_params
+
+# (scaleFactor, resolution, minNeighbors), cheapest last. Coarser scale steps
+# give each face fewer overlapping hits, so minNeighbors is relaxed with them.
+QUALITY_LADDER = (
+    (1.05, 1.0, 8),
+    (1.1, 1.0, 5),
+    (1.2, 1.0, 3),
+    (1.2, 0.75, 3),
+    (1.3, 0.75, 3),
+    (1.3, 0.5, 2),
+    (1.4, 0.5, 2),
+    (1.4, 0.35, 2),
+    (1.4, 0.25, 2),
+)
+
+
+class AdaptiveCascadeDetector(FaceDetector):
+    """Cascade detector that tunes itself to a per-frame time budget.
+
+    Detection time is smoothed with an exponential average. Above the budget
+    the detector moves one step down QUALITY_LADDER (larger scaleFactor,
+    lower detection resolution); well below it, one step back up, unless
+    that step was measured to be over budget in the last `reprobe_after`
+    frames (load changes, so old measurements expire). Steps are at least
+    `cooldown` frames apart so one slow frame does not cause a change. The
+    resolution never drops so far that the smallest face searched for is
+    under the cascade's 24px window.
+
+    minSize/maxSize are narrowed around the faces seen in the last
+    `size_history` frames. Every `full_every` frames, and after `widen_after`
+    frames without a face, the configured full range is searched again so
+    people at other distances are still found.
+    """
+
+    name = 'cascade+adaptive'
+
+    def __init__(self, budget_ms, detector=None, params=None, min_resolution=0.25, max_scale_factor=1.4,
+                 cooldown=10, smoothing=0.2, size_history=30, size_margin=0.3, full_every=30, widen_after=15,
+                 reprobe_after=300, log=print):
+        super().__init__()
+        self.detector = detector or CascadePairDetector(params)
+        self.load_time = self.detector.load_time
+        self.base_params = dict(self.detector.params)
+        self.budget_ms = budget_ms
+        self.ladder = [step for step in QUALITY_LADDER
+                       if step[0] <= max_scale_factor and step[1] >= min_resolution] or [QUALITY_LADDER[0]]
+        self.level = 0
+        self.level_ms = {}  # level -> (smoothed ms, frame it was measured at)
+        self.reprobe_after = reprobe_after
+        self.cooldown = cooldown
+        self.smoothing = smoothing
+        self.size_margin = size_margin
+        self.full_every = full_every
+        self.widen_after = widen_after
+        self.log = log
+        self.average_ms = None
+        self.frames = 0
+        self.adjustments = 0
+        self._since_change = 0
+        self._at_limit = False
+        self._since_face = 0
+        self._sizes = deque(maxlen=size_history)
+        self._small = None
+
+    @property
+    def scale_factor(self):
+        return self.ladder[self.level][0]
+
+    @property
+    def resolution(self):
+        return self.ladder[self.level][1]
+
+    def _usable(self, level):
+        # Faces smaller than the cascade window after downscaling cannot be found
+        return self.ladder[level][1] * self.search_range()[0] >= CASCADE_WINDOW
+
+    def search_range(self):
+        """(minSize, maxSize) in full-resolution pixels for the next frame"""
+        floor, ceiling = self.base_params['minSize'][0], self.base_params['maxSize'][0]
+        if not self._sizes or self._since_face >= self.widen_after or self.frames % self.full_every == 0:
+            return floor, ceiling
+        low = int(min(self._sizes) * (1 - self.size_margin))
+        high = int(max(self._sizes) * (1 + self.size_margin))
+        return max(floor, low), min(ceiling, max(high, low + 1))
+
+    def detect(self, frame):
+        start = time.perf_counter()
+        gray = self.detector.buffers.preprocess(frame)
+        low, high = self.search_range()
+        params = dict(self.base_params, scaleFactor=self.scale_factor, minNeighbors=self.ladder[self.level][2],
+                      minSize=(low, low), maxSize=(high, high))
+
+        resolution = self.resolution
+        if resolution != 1:
+            size = (int(gray.shape[1] * resolution), int(gray.shape[0] * resolution))
+            if self._small is None or self._small.shape != (size[1], size[0]):
+                self._small = np.empty((size[1], size[0]), np.uint8)
+            cv2.resize(gray, size, dst=self._small, interpolation=cv2.INTER_AREA)
+            small_params = scaled_params(resolution, params)
+            small_params['maxSize'] = tuple(map(max, small_params['maxSize'], small_params['minSize']))
+            faces = detect_faces(self._small, self.detector.cascades, small_params, self.detector.merge)
+            faces = (faces / resolution).astype(np.int32)
+        else:
+            faces = detect_faces(gray, self.detector.cascades, params, self.detector.merge)
+
+        self.frames += 1
+        if len(faces):
+            self._since_face = 0
+            self._sizes.extend(faces[:, 2].tolist())
+        else:
+            self._since_face += 1
+        self._control((time.perf_counter() - start) * 1000)
+        return faces
+
+    def _control(self, elapsed_ms):
+        if self.average_ms is None:
+            self.average_ms = elapsed_ms
+        else:
+            self.average_ms += self.smoothing * (elapsed_ms - self.average_ms)
+        self._since_change += 1
+        if self._since_change < self.cooldown:
+            return
+        self.level_ms[self.level] = (self.average_ms, self.frames)
+
+        if self.average_ms > self.budget_ms:
+            if self.level < len(self.ladder) - 1 and self._usable(self.level + 1):
+                self._change(self.level + 1, "over")
+            elif not self._at_limit:
+                self._at_limit = True
+                if self.log is not None:
+                    self.log(f"Adaptive: {self.average_ms:.1f} ms is over the {self.budget_ms:.1f} ms budget "
+                             f"at the cheapest setting that still finds {self.search_range()[0]}px faces")
+        elif self.average_ms < 0.6 * self.budget_ms and self.level > 0:
+            cost, measured = self.level_ms.get(self.level - 1, (0, 0))
+            if cost <= self.budget_ms or self.frames - measured >= self.reprobe_after:
+                self._change(self.level - 1, "under")
+
+    def _change(self, level, direction):
+        old_factor, old_resolution, _ = self.ladder[self.level]
+        self.level = level
+        self._since_change = 0
+        self._at_limit = False
+        self.adjustments += 1
+        if self.log is not None:
+            self.log(f"Adaptive: {self.average_ms:.1f} ms {direction} {self.budget_ms:.1f} ms budget, "
+                     f"scaleFactor {old_factor} -> {self.scale_factor}, "
+                     f"resolution {old_resolution:.2f} -> {self.resolution:.2f}")
+
+    def report(self):
+        low, high = self.search_range()
+        return (f"Adaptive cascade: {self.average_ms or 0:.1f} ms/frame for a {self.budget_ms:.1f} ms budget, "
+                f"scaleFactor {self.scale_factor}, resolution {self.resolution:.2f}, "
+                f"face sizes {low}-{high}px, {self.adjustments} adjustments")
+
+
+def add_adaptive_arguments(parser):
+    parser.add_argument('--target-fps', type=float,
+                        help="adapt cascade parameters so detection keeps up with this frame rate")
+    parser.add_argument('--latency-budget-ms', type=float,
+                        help="adapt cascade parameters to keep detection under this many ms per frame")
+    parser.add_argument('--min-resolution', type=float, default=0.25,
+                        help="lowest detection resolution the adaptive controller may use")
+
+
+def budget_from_args(args):
+    """Per-frame detection budget in ms, or None when adaptation is off"""
+    budgets = []
+    if args.target_fps:
+        budgets.append(1000 / args.target_fps)
+    if args.latency_budget_ms:
+        budgets.append(args.latency_budget_ms)
+    return min(budgets) if budgets else None
@@ -0,0 +1,287 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from multiprocessing import get_context
+
+import cv2
+
+from detection import draw_faces
+from detectors import add_backend_arguments, backend_options, create_detector
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff', '.webp'}
+VIDEO_EXTENSIONS = {'.mp4', '.avi', '.mov', '.mkv', '.m4v', '.mpg', '.mpeg', '.wmv'}
+
+_detector = None
+
+
+def _init_worker(backend, options):
+    # Each worker process loads its detector once and reuses it for every task.
+    # On Linux, forked workers inherit the one the parent already loaded.
+    global _detector
+    if _detector is None:
+        _detector = create_detector(backend, **options)
+
+
+def _walk(directory, exclude=None):
+    for root, dirs, names in os.walk(directory):
+        if exclude is not None:
+            # Don't descend into the output directory (pruning dirs in place stops os.walk)
+            dirs[:] = [name for name in dirs if os.path.realpath(os.path.join(root, name)) != exclude]
+        for name in names:
+            yield os.path.join(root, name)
+
+
+def find_sources(paths, exclude=None):
+    """Split the given files/directories into (images, videos).
+
+    Directories are walked recursively, skipping `exclude` (the annotate
+    directory) so earlier annotated output is not picked up as input.
+    """
+    exclude = os.path.realpath(exclude) if exclude else None
+    images, videos = [], []
+    seen = set()
+    for path in paths:
+        if os.path.isdir(path):
+            files = sorted(_walk(path, exclude))
+        else:
+            files = [path]
+        for file_path in files:
+            # The same file reached through two inputs would be processed twice
+            key = os.path.realpath(file_path)
+            if key in seen:
+                continue
+            seen.add(key)
+            ext = os.path.splitext(file_path)[1].lower()
+            if ext in IMAGE_EXTENSIONS:
+                images.append(file_path)
+            elif ext in VIDEO_EXTENSIONS:
+                videos.append(file_path)
+    return images, videos
+
+
+def annotated_paths(images, videos, annotate_dir):
+    """Where each source's annotated output goes under annotate_dir.
+
+    The inputs' directory layout below their common parent is mirrored, so
+    files with the same name in different folders do not overwrite each
+    other. Images map to a file path; videos map to a path stem that gets
+    `.partNNNNN.avi` / `.annotated.avi` appended.
+    """
+    sources = [os.path.abspath(path) for path in images + videos]
+    root = os.path.commonpath([os.path.dirname(path) for path in sources])
+    outputs = {}
+    for image, path in zip(images, sources):
+        outputs[image] = os.path.join(annotate_dir, os.path.relpath(path, root))
+    relative = [os.path.relpath(path, root) for path in sources[len(images):]]
+    stems = [os.path.splitext(rel)[0] for rel in relative]
+    for video, rel, stem in zip(videos, relative, stems):
+        # clip.mp4 and clip.avi side by side keep their extensions apart
+        outputs[video] = os.path.join(annotate_dir, rel if stems.count(stem) > 1 else stem)
+    return outputs
+
+
+def plan_tasks(images, videos, chunk_frames, chunk_images, outputs=None):
+    """Shard images into fixed-size groups and videos into frame ranges.
+
+    `outputs` maps sources to their annotated paths (see annotated_paths);
+    without it nothing is annotated.
+    """
+    outputs = outputs or {}
+    tasks = []
+    for i in range(0, len(images), chunk_images):
+        tasks.append(('images', [(image, outputs.get(image)) for image in images[i:i + chunk_images]]))
+    for video in videos:
+        output = outputs.get(video)
+        cap = cv2.VideoCapture(video)
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+        if frame_count <= 0:
+            # Unknown length (some containers): process the file as one shard
+            tasks.append(('video', (video, 0, None, 0, output)))
+            continue
+        for part, start in enumerate(range(0, frame_count, chunk_frames)):
+            tasks.append(('video', (video, start, min(start + chunk_frames, frame_count), part, output)))
+    return tasks
+
+
+def _record(source, frame_index, faces):
+    return {
+        'source': source,
+        'frame': frame_index,
+        'count': len(faces),
+        'faces': [[int(v) for v in face] for face in faces],
+    }
+
+
+def _segment_path(output, part):
+    return f"{output}.part{part:05d}.avi"
+
+
+def run_task(task):
+    kind, payload = task
+    records = []
+
+    if kind == 'images':
+        for image_path, output in payload:
+            frame = cv2.imread(image_path)
+            if frame is None:
+                records.append({'source': image_path, 'frame': 0, 'count': 0, 'faces': [], 'error': 'unreadable'})
+                continue
+            faces = _detector.detect(frame)
+            records.append(_record(image_path, 0, faces))
+            if output:
+                draw_faces(frame, faces)
+                cv2.imwrite(output, frame)
+        return records
+
+    video, start, end, part, output = payload
+    cap = cv2.VideoCapture(video)
+    if start:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25
+    writer = None
+
+    frame_index = start
+    while end is None or frame_index < end:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        faces = _detector.detect(frame)
+        records.append(_record(video, frame_index, faces))
+        if output:
+            if writer is None:
+                height, width = frame.shape[:2]
+                writer = cv2.VideoWriter(
+                    _segment_path(output, part),
+                    cv2.VideoWriter_fourcc(*'MJPG'), fps, (width, height))
+            draw_faces(frame, faces)
+            writer.write(frame)
+        frame_index += 1
+
+    cap.release()
+    if writer is not None:
+        writer.release()
+    return records
+
+
+def join_segments(output, parts):
+    """Concatenate a video's annotated shards in order and remove them"""
+    output_path = f"{output}.annotated.avi"
+    writer = None
+    for part in range(parts):
+        segment = _segment_path(output, part)
+        if not os.path.exists(segment):
+            continue
+        cap = cv2.VideoCapture(segment)
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if writer is None:
+                height, width = frame.shape[:2]
+                writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*'MJPG'),
+                                         cap.get(cv2.CAP_PROP_FPS) or 25, (width, height))
+            writer.write(frame)
+        cap.release()
+        os.remove(segment)
+    if writer is not None:
+        writer.release()
+    return output_path
+
+
+class ResultWriter:
+    """Streams per-frame records as JSONL or CSV"""
+
+    def __init__(self, stream, fmt='jsonl'):
+        self.stream = stream
+        self.fmt = fmt
+        self._csv = None
+        if fmt == 'csv':
+            self._csv = csv.writer(stream)
+            self._csv.writerow(['source', 'frame', 'count', 'faces'])
+
+    def write(self, record):
+        if self._csv is not None:
+            self._csv.writerow([record['source'], record['frame'], record['count'], json.dumps(record['faces'])])
+        else:
+            self.stream.write(json.dumps(record) + '\n')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Headless face detection over video files and image folders")
+    parser.add_argument('inputs', nargs='+', help="video files, image files or directories")
+    parser.add_argument('--output', help="results file (default: stdout)")
+    parser.add_argument('--format', choices=['jsonl', 'csv'], help="default: from --output extension, else jsonl")
+    parser.add_argument('--annotate-dir', help="write annotated images/videos into this directory")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument('--chunk-frames', type=int, default=300, help="frames per video shard")
+    parser.add_argument('--chunk-images', type=int, default=32, help="images per shard")
+    add_backend_arguments(parser)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    fmt = args.format or ('csv' if args.output and args.output.lower().endswith('.csv') else 'jsonl')
+
+    images, videos = find_sources(args.inputs, args.annotate_dir)
+    if not images and not videos:
+        print("Error: No images or videos found", file=sys.stderr)
+        return
+    outputs = {}
+    if args.annotate_dir:
+        annotate_dir = os.path.realpath(args.annotate_dir)
+        if any(os.path.isdir(path) and os.path.realpath(path) == annotate_dir for path in args.inputs):
+            print("Error: --annotate-dir must not be one of the input directories", file=sys.stderr)
+            return
+        outputs = annotated_paths(images, videos, args.annotate_dir)
+        if any(os.path.realpath(output) == os.path.realpath(source) for source, output in outputs.items()):
+            print("Error: --annotate-dir would overwrite the input files", file=sys.stderr)
+            return
+        for directory in {os.path.dirname(output) for output in outputs.values()}:
+            os.makedirs(directory, exist_ok=True)
+
+    options = backend_options(args)
+    try:
+        # Fail fast in the parent rather than in every worker; forked workers reuse this one
+        _init_worker(args.backend, options)
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return
+
+    tasks = plan_tasks(images, videos, args.chunk_frames, args.chunk_images, outputs)
+    print(f"Processing {len(images)} images and {len(videos)} videos as {len(tasks)} shards "
+          f"on {args.workers} workers", file=sys.stderr)
+
+    stream = open(args.output, 'w', newline='') if args.output else sys.stdout
+    writer = ResultWriter(stream, fmt)
+    frames = faces = 0
+    start = time.perf_counter()
+    try:
+        # Fork shares the loaded detector; macOS defaults to spawn because forking there is unsafe
+        ctx = get_context('fork' if sys.platform.startswith('linux') else None)
+        with ctx.Pool(args.workers, initializer=_init_worker, initargs=(args.backend, options)) as pool:
+            # imap keeps shard order, so results stream out in frame order
+            for records in pool.imap(run_task, tasks):
+                for record in records:
+                    writer.write(record)
+                    frames += 1
+                    faces += record['count']
+    finally:
+        if args.output:
+            stream.close()
+
+    if args.annotate_dir:
+        for video in videos:
+            parts = sum(1 for kind, payload in tasks if kind == 'video' and payload[0] == video)
+            join_segments(outputs[video], parts)
+
+    elapsed = time.perf_counter() - start
+    print(f"{frames} frames, {faces} faces in {elapsed:.1f}s ({frames / elapsed:.1f} frames/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
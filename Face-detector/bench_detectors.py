@@ -0,0 +1,107 @@
+import argparse
+import json
+import os
+import resource
+import sys
+import time
+from multiprocessing import get_context
+
+import cv2
+
+from detectors import BACKENDS, create_detector
+from nms import match_boxes
+
+
+def load_labels(dataset_dir):
+    """labels.json maps image file names to lists of [x, y, w, h] faces"""
+    with open(os.path.join(dataset_dir, 'labels.json'), encoding='utf-8') as f:
+        labels = json.load(f)
+    return [(os.path.join(dataset_dir, name), boxes) for name, boxes in sorted(labels.items())]
+
+
+def _rss_mb():
+    # ru_maxrss is kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def evaluate(backend, options, samples, threshold):
+    """Runs in a fresh process so load time and memory are not shared between backends"""
+    base_rss = _rss_mb()
+    try:
+        detector = create_detector(backend, **options)
+    except RuntimeError as e:
+        return {'backend': backend, 'error': str(e)}
+    loaded_rss = _rss_mb()
+
+    images = [(cv2.imread(path), boxes) for path, boxes in samples]
+    images = [(image, boxes) for image, boxes in images if image is not None]
+    if images:
+        detector.detect(images[0][0])  # warm-up
+
+    labeled = predicted = matched = 0
+    elapsed = 0.0
+    for image, boxes in images:
+        start = time.perf_counter()
+        faces = detector.detect(image)
+        elapsed += time.perf_counter() - start
+        hits, _ = match_boxes(boxes, faces, threshold)
+        labeled += len(boxes)
+        predicted += len(faces)
+        matched += hits
+
+    return {
+        'backend': backend,
+        'images': len(images),
+        'precision': matched / predicted if predicted else 1.0,
+        'recall': matched / labeled if labeled else 1.0,
+        'ms_per_frame': elapsed / len(images) * 1000 if images else 0.0,
+        'load_ms': detector.load_time * 1000,
+        'model_mb': loaded_rss - base_rss,
+        'peak_mb': _rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare face detector backends on a labeled image set")
+    parser.add_argument('dataset', help="directory with images and a labels.json of [x, y, w, h] boxes per image")
+    parser.add_argument('--backends', nargs='+', default=sorted(BACKENDS), choices=sorted(BACKENDS))
+    parser.add_argument('--model', help="model file for the dnn backend")
+    parser.add_argument('--iou', type=float, default=0.5, help="IoU needed to count a detection as correct")
+    parser.add_argument('--min-precision', type=float, default=0.0)
+    parser.add_argument('--min-recall', type=float, default=0.0)
+    args = parser.parse_args()
+
+    samples = load_labels(args.dataset)
+    options = {'cascade': {}, 'dnn': {'model_path': args.model}}
+
+    results = []
+    ctx = get_context('spawn')
+    for backend in args.backends:
+        with ctx.Pool(1) as pool:
+            results.append(pool.apply(evaluate, (backend, options[backend], samples, args.iou)))
+
+    print(f"{'backend':10} {'precision':>9} {'recall':>7} {'ms/frame':>9} {'load ms':>8} {'model MB':>9} {'peak MB':>8}")
+    for result in results:
+        if 'error' in result:
+            print(f"{result['backend']:10} skipped: {result['error']}")
+            continue
+        print(f"{result['backend']:10} {result['precision']:9.1%} {result['recall']:7.1%} "
+              f"{result['ms_per_frame']:9.1f} {result['load_ms']:8.1f} {result['model_mb']:9.1f} "
+              f"{result['peak_mb']:8.1f}")
+
+    eligible = [
+        result for result in results
+        if 'error' not in result
+        and result['precision'] >= args.min_precision and result['recall'] >= args.min_recall
+    ]
+    if eligible:
+        best = min(eligible, key=lambda result: result['ms_per_frame'])
+        print(f"Fastest backend meeting precision >= {args.min_precision:.0%} and recall >= "
+              f"{args.min_recall:.0%}: {best['backend']}")
+    else:
+        print("No backend meets the accuracy requirements")
+
+
+if __name__ == "__main__":
+    main()
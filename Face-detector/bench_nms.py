@@ -0,0 +1,83 @@
+import argparse
+import time
+
+import numpy as np
+
+from nms import aspect_mask, as_boxes, batched_nms, nms, weighted_box_fusion
+
+
+def legacy_merge(all_faces):
+    # The original nested loop from face_detection_app.main()
+    faces = []
+    for (x, y, w, h) in all_faces:
+        aspect_ratio = w / h
+        if 0.7 <= aspect_ratio <= 1.4:
+            overlap = False
+            for (fx, fy, fw, fh) in faces:
+                overlap_x = max(0, min(x + w, fx + fw) - max(x, fx))
+                overlap_y = max(0, min(y + h, fy + fh) - max(y, fy))
+                if overlap_x * overlap_y > 0.3 * w * h:
+                    overlap = True
+                    break
+            if not overlap:
+                faces.append((x, y, w, h))
+    return faces
+
+
+def crowded_scene(rng, people, width=1920, height=1080):
+    """Two detectors' worth of jittered boxes around `people` random faces"""
+    sizes = rng.integers(30, 120, people)
+    xs = rng.integers(0, width - 120, people)
+    ys = rng.integers(0, height - 120, people)
+    detectors = []
+    for _ in range(2):
+        jitter = rng.integers(-6, 7, (people, 4))
+        boxes = np.stack([xs, ys, sizes, sizes], axis=1) + jitter
+        boxes[:, 2:] = np.maximum(boxes[:, 2:], 10)
+        detectors.append(boxes[rng.random(people) < 0.9])
+    return detectors
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark box merging on crowded scenes")
+    parser.add_argument('--people', type=int, nargs='+', default=[10, 100, 500, 1000])
+    parser.add_argument('--frames', type=int, default=100, help="frames for the batched run")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+
+    for people in args.people:
+        detectors = crowded_scene(rng, people)
+        flat = [tuple(int(v) for v in box) for boxes in detectors for box in boxes]
+        candidates = np.concatenate(detectors)
+        candidates = candidates[aspect_mask(candidates)]
+
+        legacy_ms, legacy = timed(lambda: legacy_merge(flat), args.repeat)
+        nms_ms, kept = timed(lambda: nms(candidates, threshold=0.3, metric='iomin'), args.repeat)
+        wbf_ms, (fused, _) = timed(
+            lambda: weighted_box_fusion(detectors, threshold=0.3, metric='iomin'), args.repeat)
+
+        # Shuffling the input must not change the NMS result
+        shuffled = candidates[rng.permutation(len(candidates))]
+        stable = sorted(map(tuple, as_boxes(candidates)[kept].tolist())) == \
+            sorted(map(tuple, as_boxes(shuffled)[nms(shuffled, threshold=0.3, metric='iomin')].tolist()))
+
+        print(f"{len(flat):5d} boxes | legacy loop {legacy_ms:8.2f} ms -> {len(legacy):4d} | "
+              f"nms {nms_ms:7.2f} ms -> {len(kept):4d} | wbf {wbf_ms:7.2f} ms -> {len(fused):4d} | "
+              f"order independent: {stable}")
+
+    frames = [np.concatenate(crowded_scene(rng, 20, 640, 480)) for _ in range(args.frames)]
+    loop_ms, _ = timed(lambda: [nms(f, threshold=0.3, metric='iomin') for f in frames], args.repeat)
+    batch_ms, _ = timed(lambda: batched_nms(frames, threshold=0.3, metric='iomin'), args.repeat)
+    print(f"{args.frames} frames x ~36 boxes: per-frame nms {loop_ms:.2f} ms, batched {batch_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+STAGES = ('import_ms', 'first_load_ms', 'cached_load_ms')
+
+
+def measure(backend):
+    """Runs in a fresh interpreter: time the app import and detector loads"""
+    start = time.perf_counter()
+    import face_detection_app  # noqa: F401
+    imported = time.perf_counter()
+
+    from detectors import create_detector
+    create_detector(backend)
+    loaded = time.perf_counter()
+    # A second detector, as each pipeline/camera worker thread builds one
+    create_detector(backend)
+    reloaded = time.perf_counter()
+
+    return {
+        'import_ms': (imported - start) * 1000,
+        'first_load_ms': (loaded - imported) * 1000,
+        'cached_load_ms': (reloaded - loaded) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure face detection app startup: imports and model loading")
+    parser.add_argument('--runs', type=int, default=5, help="fresh interpreters to average over")
+    parser.add_argument('--backend', default='cascade')
+    parser.add_argument('--output', help="append the result as a JSON line to this file")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.backend)))
+        return
+
+    runs = []
+    for _ in range(args.runs):
+        result = subprocess.run([sys.executable, __file__, '--child', '--backend', args.backend],
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            print(f"Error: {result.stderr.strip().splitlines()[-1]}")
+            return
+        runs.append(json.loads(result.stdout))
+
+    summary = {stage: statistics.median(run[stage] for run in runs) for stage in STAGES}
+    for stage in STAGES:
+        print(f"{stage:15} {summary[stage]:8.1f} ms (median of {len(runs)})")
+
+    if args.output:
+        record = dict(summary, app='face_detection_app', backend=args.backend, runs=len(runs), time=time.time())
+        with open(args.output, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + '\n')
+
+
+if __name__ == "__main__":
+    main()
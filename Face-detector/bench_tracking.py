@@ -0,0 +1,73 @@
+import argparse
+import time
+
+import cv2
+
+from detection import load_cascades, preprocess, detect_faces
+from nms import match_boxes
+from tracking import KeyframeTracker
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare full-frame detection on every frame with keyframe detection + tracking")
+    parser.add_argument('video', help="video file to replay")
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--track-every', type=int, default=5)
+    parser.add_argument('--detect-scale', type=float, default=0.5)
+    parser.add_argument('--min-confidence', type=float, default=0.6)
+    args = parser.parse_args()
+
+    cap = cv2.VideoCapture(args.video)
+    if not cap.isOpened():
+        print(f"Error: Could not open {args.video}")
+        return
+
+    cascades = load_cascades()
+    if cascades is None:
+        print("Error: Could not load face cascade classifiers")
+        return
+    tracker = KeyframeTracker(cascades, args.track_every, args.detect_scale, args.min_confidence)
+
+    baseline_time = tracked_time = 0.0
+    reference_total = predicted_total = matched_total = 0
+    iou_total = 0.0
+    frames = 0
+
+    while frames < args.frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames += 1
+
+        start = time.perf_counter()
+        reference = detect_faces(preprocess(frame), cascades)
+        baseline_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        predicted = tracker.process(preprocess(frame))
+        tracked_time += time.perf_counter() - start
+
+        matched, iou_sum = match_boxes(reference, predicted)
+        reference_total += len(reference)
+        predicted_total += len(predicted)
+        matched_total += matched
+        iou_total += iou_sum
+
+    cap.release()
+    if not frames:
+        print("No frames read")
+        return
+
+    recall = matched_total / reference_total if reference_total else 1.0
+    precision = matched_total / predicted_total if predicted_total else 1.0
+    print(f"{frames} frames")
+    print(f"full detection every frame: {frames / baseline_time:.1f} FPS ({baseline_time / frames * 1000:.1f} ms/frame)")
+    print(f"keyframe + tracking:        {frames / tracked_time:.1f} FPS ({tracked_time / frames * 1000:.1f} ms/frame), "
+          f"detection ran on {tracker.detection_ratio:.0%} of frames ({tracker.redetections} early re-detections)")
+    print(f"agreement with full detection (IoU >= 0.5): recall {recall:.1%}, precision {precision:.1%}, "
+          f"mean IoU {iou_total / matched_total if matched_total else 0:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import threading
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+from nms import as_boxes, aspect_mask, nms, weighted_box_fusion
+
+CASCADE_FILES = ('haarcascade_frontalface_default.xml', 'haarcascade_frontalface_alt.xml')
+
+DETECT_PARAMS = {
+    'scaleFactor': 1.05,
+    'minNeighbors': 8,
+    'minSize': (40, 40),
+    'maxSize': (300, 300),
+    'flags': cv2.CASCADE_SCALE_IMAGE,
+}
+
+# Boxes overlapping by more than this share of the smaller box are one face
+MERGE_THRESHOLD = 0.3
+
+
+# Parsed cascade XML per file, kept for the life of the process
+_parsed_cascades = {}
+_parse_lock = threading.Lock()
+
+
+def load_cascade(name):
+    """A new classifier for a bundled cascade file, or None if it cannot be loaded.
+
+    Parsing the XML is most of the load time, so the parsed file is cached
+    and later classifiers (other threads, or worker processes forked after
+    the first load) are built from it. Each call still returns its own
+    classifier, as they are not shared between threads.
+    """
+    path = cv2.data.haarcascades + name
+    with _parse_lock:
+        storage = _parsed_cascades.get(name)
+        if storage is None:
+            storage = cv2.FileStorage(path, cv2.FILE_STORAGE_READ)
+            if not storage.isOpened():
+                return None
+            _parsed_cascades[name] = storage
+        cascade = cv2.CascadeClassifier()
+        if cascade.read(storage.getFirstTopLevelNode()):
+            return cascade
+    # Old-style cascades cannot be read from a node; load them the slow way
+    cascade = cv2.CascadeClassifier(path)
+    return None if cascade.empty() else cascade
+
+
+def load_cascades(names=CASCADE_FILES):
+    """Load both face cascades, or return None if either fails"""
+    cascades = [load_cascade(name) for name in names]
+    if any(cascade is None for cascade in cascades):
+        return None
+    return cascades
+
+
+# Overlay style
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+BOX_COLOR = (0, 255, 0)
+COUNT_ORIGIN = (15, 30)
+
+
+def preprocess(frame):
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return cv2.equalizeHist(gray)
+
+
+class FrameBuffers:
+    """Preallocated grayscale and equalized images reused for every frame.
+
+    preprocess() writes into the same two arrays each call (reallocating only
+    when the frame size changes), so the returned image is overwritten by the
+    next frame. Use one instance per thread.
+    """
+
+    def __init__(self):
+        self.gray = None
+        self.equalized = None
+
+    def preprocess(self, frame):
+        height, width = frame.shape[:2]
+        if self.gray is None or self.gray.shape != (height, width):
+            self.gray = np.empty((height, width), np.uint8)
+            self.equalized = np.empty((height, width), np.uint8)
+        if frame.ndim == 2:
+            np.copyto(self.gray, frame)
+        else:
+            cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self.gray)
+        cv2.equalizeHist(self.gray, dst=self.equalized)
+        return self.equalized
+
+
+def merge_faces(detections, method='nms', threshold=MERGE_THRESHOLD):
+    """Merge per-detector boxes into one (N, 4) int32 array of (x, y, w, h) faces.
+
+    Boxes with an unlikely aspect ratio are dropped first. 'nms' keeps the
+    largest of any boxes overlapping by more than `threshold` of the smaller
+    box; 'wbf' averages them instead (see nms.weighted_box_fusion).
+    """
+    filtered = [boxes[aspect_mask(boxes)] for boxes in map(as_boxes, detections)]
+    if method == 'wbf':
+        boxes, _ = weighted_box_fusion(filtered, threshold=threshold, metric='iomin')
+    else:
+        boxes = np.concatenate(filtered) if filtered else as_boxes([])
+        boxes = boxes[nms(boxes, threshold=threshold, metric='iomin')]
+    return np.rint(boxes).astype(np.int32)
+
+
+def detect_faces(gray, cascades, params=None, method='nms'):
+    """Run every cascade on a preprocessed frame and merge the results"""
+    params = params or DETECT_PARAMS
+    return merge_faces([cascade.detectMultiScale(gray, **params) for cascade in cascades], method)
+
+
+@lru_cache(maxsize=64)
+def _count_overlay(face_count):
+    # Text and background box only depend on the count, so measure each once
+    count_text = f"People detected: {face_count}"
+    text_size = cv2.getTextSize(count_text, FONT, 0.8, 2)[0]
+    return count_text, (text_size[0] + 20, text_size[1] + 20)
+
+
+def draw_faces(frame, faces, ids=None):
+    faces = faces.tolist() if isinstance(faces, np.ndarray) else faces
+    labels = ['Face'] * len(faces) if ids is None else [f"ID {face_id}" for face_id in ids]
+    for (x, y, w, h), label in zip(faces, labels):
+        cv2.rectangle(frame, (x, y), (x + w, y + h), BOX_COLOR, 2)
+        cv2.putText(frame, label, (x, y-10), FONT, 0.6, BOX_COLOR, 2)
+
+    count_text, corner = _count_overlay(len(faces))
+    cv2.rectangle(frame, (10, 10), corner, (0, 0, 0), -1)
+    cv2.putText(frame, count_text, COUNT_ORIGIN, FONT, 0.8, (255, 255, 255), 2)
@@ -0,0 +1,154 @@
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from detection import CASCADE_FILES, DETECT_PARAMS, FrameBuffers, detect_faces, load_cascades
+
+MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+
+# OpenCV's YuNet face detector; the res10 SSD Caffe model also works
+DEFAULT_DNN_MODEL = os.path.join(MODEL_DIR, 'face_detection_yunet_2023mar.onnx')
+SSD_CONFIG = os.path.join(MODEL_DIR, 'deploy.prototxt')
+
+_model_buffers = {}
+_model_lock = threading.Lock()
+
+
+def _model_buffer(path):
+    """A model file's bytes as a uint8 array, read from disk once per process.
+
+    Every DnnDetector (one per worker thread) builds its network from the
+    same buffer, like load_cascade does for the cascade XML.
+    """
+    key = os.path.realpath(path)
+    with _model_lock:
+        buffer = _model_buffers.get(key)
+        if buffer is None:
+            with open(path, 'rb') as f:
+                buffer = np.frombuffer(f.read(), np.uint8)
+            _model_buffers[key] = buffer
+        return buffer
+
+
+class FaceDetector:
+    """Common interface for detection backends.
+
+    detect() takes a BGR frame and returns an (N, 4) int32 array of
+    (x, y, w, h) faces. Detectors keep per-frame scratch buffers, so use one
+    instance per thread.
+    """
+
+    name = None
+
+    def __init__(self):
+        self.load_time = 0.0
+
+    def detect(self, frame):
+        raise NotImplementedError
+
+
+class CascadePairDetector(FaceDetector):
+    """The original pair of Haar cascades, merged with NMS or box fusion"""
+
+    name = 'cascade'
+
+    def __init__(self, params=None, merge='nms', cascade_files=CASCADE_FILES):
+        super().__init__()
+        start = time.perf_counter()
+        self.cascades = load_cascades(cascade_files)
+        if self.cascades is None:
+            raise RuntimeError("Could not load face cascade classifiers")
+        self.load_time = time.perf_counter() - start
+        self.params = params or DETECT_PARAMS
+        self.merge = merge
+        self.buffers = FrameBuffers()
+
+    def detect(self, frame):
+        return self.detect_gray(self.buffers.preprocess(frame))
+
+    def detect_gray(self, gray):
+        return detect_faces(gray, self.cascades, self.params, self.merge)
+
+
+class DnnDetector(FaceDetector):
+    """OpenCV CPU DNN face detector.
+
+    An .onnx model is run through cv2.FaceDetectorYN (YuNet); a .caffemodel
+    is treated as the res10 300x300 SSD and needs its deploy.prototxt.
+    """
+
+    name = 'dnn'
+
+    def __init__(self, model_path=DEFAULT_DNN_MODEL, config_path=None, confidence=0.6, nms_threshold=0.3):
+        super().__init__()
+        if not os.path.exists(model_path):
+            raise RuntimeError(f"DNN face model not found: {model_path}")
+        self.confidence = confidence
+        start = time.perf_counter()
+        try:
+            if model_path.lower().endswith('.onnx'):
+                self._yunet = cv2.FaceDetectorYN.create('onnx', _model_buffer(model_path), np.empty(0, np.uint8),
+                                                        (320, 320), confidence, nms_threshold, 5000)
+                self._net = None
+            else:
+                config_path = config_path or SSD_CONFIG
+                if not os.path.exists(config_path):
+                    raise RuntimeError(f"SSD config not found: {config_path}")
+                self._net = cv2.dnn.readNetFromCaffe(_model_buffer(config_path), _model_buffer(model_path))
+                self._net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+                self._net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+                self._yunet = None
+        except cv2.error as e:
+            raise RuntimeError(f"Could not load DNN face model {model_path}: {e}")
+        self.load_time = time.perf_counter() - start
+        self._input_size = None
+
+    def detect(self, frame):
+        height, width = frame.shape[:2]
+        if self._yunet is not None:
+            if self._input_size != (width, height):
+                self._yunet.setInputSize((width, height))
+                self._input_size = (width, height)
+            _, faces = self._yunet.detect(frame)
+            if faces is None:
+                return np.empty((0, 4), np.int32)
+            return np.rint(faces[:, :4]).astype(np.int32)
+
+        blob = cv2.dnn.blobFromImage(cv2.resize(frame, (300, 300)), 1.0, (300, 300), (104.0, 177.0, 123.0))
+        self._net.setInput(blob)
+        detections = self._net.forward()[0, 0]
+        detections = detections[detections[:, 2] >= self.confidence]
+        corners = (detections[:, 3:7] * (width, height, width, height)).astype(np.int32)
+        np.clip(corners, 0, (width, height, width, height), out=corners)
+        corners[:, 2:] -= corners[:, :2]
+        return corners[(corners[:, 2] > 0) & (corners[:, 3] > 0)]
+
+
+BACKENDS = {
+    CascadePairDetector.name: CascadePairDetector,
+    DnnDetector.name: DnnDetector,
+}
+
+
+def create_detector(backend='cascade', **options):
+    """Build a detector by backend name; raises RuntimeError if it cannot load"""
+    if backend not in BACKENDS:
+        raise RuntimeError(f"Unknown detector backend: {backend} (choose from {', '.join(BACKENDS)})")
+    return BACKENDS[backend](**{key: value for key, value in options.items() if value is not None})
+
+
+def add_backend_arguments(parser):
+    parser.add_argument('--backend', choices=sorted(BACKENDS), default='cascade', help="face detector backend")
+    parser.add_argument('--model', help=f"model file for --backend dnn (default: {DEFAULT_DNN_MODEL})")
+    parser.add_argument('--merge', choices=['nms', 'wbf'], default='nms',
+                        help="how boxes from the two cascades are combined")
+
+
+def backend_options(args):
+    """create_detector() keyword arguments from add_backend_arguments() options"""
+    if args.backend == DnnDetector.name:
+        return {'model_path': args.model}
+    return {'merge': args.merge}
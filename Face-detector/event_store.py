@@ -0,0 +1,201 @@
+import argparse
+import glob
+import json
+import os
+import queue
+import threading
+import time
+
+
+class OccupancyAggregator:
+    """Rolls per-frame people counts up into fixed time buckets"""
+
+    def __init__(self, bucket_seconds, kind):
+        self.bucket_seconds = bucket_seconds
+        self.kind = kind
+        self._bucket = None
+        self._counts = []
+
+    def add(self, timestamp, count):
+        """Add one sample; returns the finished bucket record when a new bucket starts"""
+        bucket = int(timestamp // self.bucket_seconds) * self.bucket_seconds
+        finished = None
+        if self._bucket is not None and bucket != self._bucket:
+            finished = self.flush()
+        self._bucket = bucket
+        self._counts.append(count)
+        return finished
+
+    def flush(self):
+        if self._bucket is None or not self._counts:
+            return None
+        record = {
+            'type': self.kind,
+            'time': self._bucket,
+            'samples': len(self._counts),
+            'min': min(self._counts),
+            'max': max(self._counts),
+            'mean': sum(self._counts) / len(self._counts),
+        }
+        self._bucket = None
+        self._counts = []
+        return record
+
+
+class EventWriter:
+    """Writes detection events to rolling JSONL segments from a background thread.
+
+    record() only enqueues and never blocks: if the disk falls behind and the
+    queue fills, events are dropped and counted instead of stalling capture.
+    Write errors (disk full, directory removed) are counted in `lost` and
+    the thread keeps draining the queue. The writer thread also feeds
+    per-second and per-minute occupancy aggregators and writes their
+    buckets into the same segments.
+    """
+
+    def __init__(self, directory, segment_seconds=3600, max_segments=48, queue_size=2048, flush_interval=1.0):
+        self.directory = directory
+        self.segment_seconds = segment_seconds
+        self.max_segments = max_segments
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.written = 0
+        self.lost = 0
+        self.last_error = None
+        self._closed = threading.Event()
+        self._queue = queue.Queue(queue_size)
+        self._aggregators = [OccupancyAggregator(1, 'second'), OccupancyAggregator(60, 'minute')]
+        self._file = None
+        self._segment_start = None
+        os.makedirs(directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def record(self, faces, timestamp=None, frame_index=None, source=None, ids=None):
+        event = {
+            'type': 'frame',
+            'time': time.time() if timestamp is None else timestamp,
+            'count': len(faces),
+            'faces': [[int(v) for v in face] for face in faces],
+        }
+        if self._closed.is_set():
+            self.dropped += 1
+            return
+        if ids is not None:
+            event['ids'] = [int(face_id) for face_id in ids]
+        if frame_index is not None:
+            event['frame'] = frame_index
+        if source is not None:
+            event['source'] = source
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            batch = []
+            try:
+                batch.append(self._queue.get(timeout=self.flush_interval))
+                while True:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            # Late record() calls can land after the close sentinel, so look for it anywhere
+            closing = any(event is None for event in batch)
+            batch = [event for event in batch if event is not None]
+            if batch:
+                try:
+                    self._write(batch)
+                except OSError as e:
+                    self._failed(e, len(batch))
+            if closing or (self._closed.is_set() and self._queue.empty()):
+                break
+
+        lines = [record for aggregator in self._aggregators for record in [aggregator.flush()] if record]
+        try:
+            if lines:
+                self._write_lines(lines, self._segment_start or time.time())
+        except OSError as e:
+            self._failed(e, 0)
+        if self._file is not None:
+            self._file.close()
+
+    def _failed(self, error, events):
+        self.lost += events
+        self.last_error = str(error)
+        if self._file is not None:
+            # Reopen on the next write, in case the directory comes back
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
+
+    def _write(self, events):
+        lines = []
+        for event in events:
+            lines.append(event)
+            for aggregator in self._aggregators:
+                finished = aggregator.add(event['time'], event['count'])
+                if finished:
+                    lines.append(finished)
+        self._write_lines(lines, events[-1]['time'])
+        self.written += len(events)
+
+    def _write_lines(self, records, timestamp):
+        self._rotate(timestamp)
+        self._file.write(''.join(json.dumps(record) + '\n' for record in records))
+        self._file.flush()
+
+    def _rotate(self, timestamp):
+        if self._file is not None and timestamp - self._segment_start < self.segment_seconds:
+            return
+        if self._file is not None:
+            self._file.close()
+        self._segment_start = timestamp
+        name = time.strftime('events-%Y%m%d-%H%M%S', time.localtime(timestamp))
+        os.makedirs(self.directory, exist_ok=True)
+        self._file = open(os.path.join(self.directory, f"{name}.jsonl"), 'a', encoding='utf-8')
+
+        segments = sorted(glob.glob(os.path.join(self.directory, 'events-*.jsonl')))
+        for old in segments[:-self.max_segments]:
+            os.remove(old)
+
+    def close(self, timeout=5.0):
+        """Stop accepting events, flush what is queued and wait up to `timeout` seconds"""
+        self._closed.set()
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass  # the thread also stops once closed and the queue is empty
+        self._thread.join(timeout)
+
+
+def read_events(directory, kind=None):
+    """Yield stored records in time order, optionally only one type
+    ('frame', 'second' or 'minute')"""
+    for path in sorted(glob.glob(os.path.join(directory, 'events-*.jsonl'))):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if kind is None or record['type'] == kind:
+                    yield record
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print the occupancy series recorded by --events-dir")
+    parser.add_argument('directory')
+    parser.add_argument('--series', choices=['second', 'minute'], default='minute')
+    args = parser.parse_args()
+
+    for record in read_events(args.directory, args.series):
+        stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(record['time']))
+        print(f"{stamp}  mean {record['mean']:.2f}  min {record['min']}  max {record['max']}  "
+              f"({record['samples']} frames)")
+
+
+if __name__ == "__main__":
+    main()
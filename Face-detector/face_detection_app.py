@@ -1,89 +1,250 @@
+import argparse
+import time
+
 import cv2
 import sys
 
+from adaptive import AdaptiveCascadeDetector, add_adaptive_arguments, budget_from_args
+from detection import FrameBuffers, draw_faces
+from detectors import CascadePairDetector, add_backend_arguments, backend_options, create_detector
+from event_store import EventWriter
+from motion import MotionGatedDetector, add_motion_arguments, gate_from_args
+from pipeline import FacePipeline
+from profiling import FrameProfiler, stage
+from tracking import MATCHERS, SIMILARITIES, IdTracker, KeyframeTracker
+
+WINDOW_NAME = 'Face Detection App'
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Real-time face detection from a camera")
+    parser.add_argument('--camera', type=int, default=0, help="camera index")
+    parser.add_argument('--pipeline', action='store_true',
+                        help="run capture, detection and display as separate threaded stages")
+    parser.add_argument('--workers', type=int, default=2, help="detection threads in --pipeline mode")
+    parser.add_argument('--track-every', type=int, default=0,
+                        help="detect every N frames on a downscaled frame and track faces in between (0 = off)")
+    parser.add_argument('--detect-scale', type=float, default=0.5,
+                        help="frame scale used for keyframe detection with --track-every")
+    parser.add_argument('--ids', action='store_true',
+                        help="give faces stable IDs and count unique visitors (sequential mode)")
+    parser.add_argument('--id-match', choices=sorted(MATCHERS), default='greedy',
+                        help="how detections are assigned to tracks with --ids")
+    parser.add_argument('--id-similarity', choices=sorted(SIMILARITIES), default='iou',
+                        help="box overlap or centre distance for --ids association")
+    parser.add_argument('--id-detect-every', type=int, default=1,
+                        help="with --ids, detect every N frames and move tracks by their velocity in between")
+    parser.add_argument('--report-interval', type=float, default=5.0,
+                        help="seconds between stage latency reports in --pipeline mode")
+    parser.add_argument('--profile', action='store_true',
+                        help="print time and memory allocated per stage for every frame (sequential mode)")
+    parser.add_argument('--events-dir',
+                        help="record per-frame detections and occupancy series as JSONL segments in this directory")
+    parser.add_argument('--serve', type=int, metavar='PORT',
+                        help="run headless: serve /stream.mjpg, /detections and /stats on this port instead of a window")
+    parser.add_argument('--host', default='127.0.0.1', help="address to bind with --serve")
+    parser.add_argument('--jpeg-quality', type=int, default=80, help="MJPEG quality with --serve")
+    add_backend_arguments(parser)
+    add_motion_arguments(parser)
+    add_adaptive_arguments(parser)
+    return parser.parse_args()
+
+
+def print_detector_reports(detector):
+    # Motion gating and adaptive tuning wrap the base detector and keep their own stats
+    while isinstance(detector, (MotionGatedDetector, AdaptiveCascadeDetector)):
+        print(detector.report())
+        detector = detector.detector
+
+
+def run_sequential(cap, detector, tracker=None, events=None, server=None, report_interval=5.0, profiler=None,
+                   id_tracker=None, detect_every=1):
+    buffers = FrameBuffers()
+    ids = None
+    frame = None
+    frame_index = 0
+    next_report = time.perf_counter() + report_interval
+    while True:
+        with stage(profiler, 'capture'):
+            # Decode into the previous frame's array; it has been shown or encoded by now
+            ret, frame = cap.read(frame)
+
+        if not ret:
+            print("Error: Failed to capture frame")
+            break
+
+        with stage(profiler, 'detect'):
+            if id_tracker is not None and frame_index % detect_every:
+                ids, faces = id_tracker.coast()
+            else:
+                if tracker is not None:
+                    faces = tracker.process(buffers.preprocess(frame))
+                else:
+                    faces = detector.detect(frame)
+                if id_tracker is not None:
+                    ids, faces = id_tracker.update(faces)
+        if events is not None:
+            events.record(faces, frame_index=frame_index, ids=ids)
+        frame_index += 1
+        with stage(profiler, 'draw'):
+            draw_faces(frame, faces, ids)
+
+        if server is not None:
+            with stage(profiler, 'publish'):
+                server.broadcaster.publish(frame, faces, ids)
+            if profiler is not None:
+                profiler.end_frame()
+            if time.perf_counter() >= next_report:
+                print(server.broadcaster.report())
+                next_report += report_interval
+            continue
+
+        with stage(profiler, 'display'):
+            cv2.imshow(WINDOW_NAME, frame)
+            key = cv2.waitKey(1) & 0xFF
+        if profiler is not None:
+            profiler.end_frame()
+        if key == ord('q') or key == 27:
+            break
+
+    if profiler is not None:
+        print(profiler.summary())
+    if id_tracker is not None:
+        print(id_tracker.report())
+
+    print_detector_reports(detector)
+    if tracker is not None:
+        print(f"Detection ran on {tracker.detection_ratio:.0%} of frames "
+              f"({tracker.redetections} early re-detections)")
+
+
+def run_pipeline(cap, workers, report_interval, detector_factory, events=None, server=None):
+    on_result = None
+    if events is not None:
+        on_result = lambda seq, faces: events.record(faces, frame_index=seq)
+    pipeline = FacePipeline(cap, detector_factory, workers=workers, on_result=on_result)
+    try:
+        pipeline.start()
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        return
+
+    next_report = time.perf_counter() + report_interval
+    try:
+        while not pipeline.stop_event.is_set():
+            if server is not None:
+                if not pipeline.deliver(server.broadcaster.publish):
+                    time.sleep(0.005)
+            else:
+                pipeline.show(WINDOW_NAME)
+                key = cv2.waitKey(1) & 0xFF
+                if key == ord('q') or key == 27:
+                    break
+
+            if time.perf_counter() >= next_report:
+                print(pipeline.report())
+                if server is not None:
+                    print(server.broadcaster.report())
+                next_report += report_interval
+    finally:
+        pipeline.stop()
+
+    if pipeline.capture_error:
+        print(pipeline.capture_error)
+    print(pipeline.report())
+    for detector in pipeline.detectors:
+        print_detector_reports(detector)
+
+
 def main():
-    cap = cv2.VideoCapture(0)
-    
+    args = parse_args()
+    cap = cv2.VideoCapture(args.camera)
+
     if not cap.isOpened():
         print("Error: Could not open camera")
         return
-    
-    face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-    face_cascade_alt = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_alt.xml')
-    
-    if face_cascade.empty() or face_cascade_alt.empty():
-        print("Error: Could not load face cascade classifiers")
+
+    options = backend_options(args)
+    budget_ms = budget_from_args(args)
+    if budget_ms and args.backend != 'cascade':
+        print("Error: --target-fps and --latency-budget-ms need the cascade backend")
+        cap.release()
+        return
+
+    def make_detector():
+        detector = create_detector(args.backend, **options)
+        if budget_ms:
+            detector = AdaptiveCascadeDetector(budget_ms, detector, min_resolution=args.min_resolution)
+        if args.motion_gate:
+            detector = MotionGatedDetector(detector, gate_from_args(args))
+        return detector
+
+    try:
+        detector = make_detector()
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        cap.release()
+        return
+
+    if args.track_every and not isinstance(detector, CascadePairDetector):
+        print("Error: --track-every needs the cascade backend without --motion-gate or an adaptive budget")
+        cap.release()
+        return
+
+    if args.ids and args.pipeline:
+        print("Error: --ids needs frames in order and does not work with --pipeline")
         cap.release()
         return
-    
+
+    server = None
+    if args.serve:
+        # http.server is only needed headless, so it is not imported on every launch
+        from stream_server import StreamServer
+
+        try:
+            server = StreamServer((args.host, args.serve), args.jpeg_quality)
+        except OSError as e:
+            print(f"Error: Could not start server: {e}")
+            cap.release()
+            return
+        server.start()
+
     print("Face Detection App Started!")
-    print("Press 'q' to quit, 'ESC' to exit")
-    
-    while True:
-        ret, frame = cap.read()
-        
-        if not ret:
-            print("Error: Failed to capture frame")
-            break
-        
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        gray = cv2.equalizeHist(gray)
-        
-        faces1 = face_cascade.detectMultiScale(
-            gray,
-            scaleFactor=1.05,
-            minNeighbors=8,
-            minSize=(40, 40),
-            maxSize=(300, 300),
-            flags=cv2.CASCADE_SCALE_IMAGE
-        )
-        
-        faces2 = face_cascade_alt.detectMultiScale(
-            gray,
-            scaleFactor=1.05,
-            minNeighbors=8,
-            minSize=(40, 40),
-            maxSize=(300, 300),
-            flags=cv2.CASCADE_SCALE_IMAGE
-        )
-        
-        all_faces = list(faces1) + list(faces2)
-        faces = []
-        
-        for (x, y, w, h) in all_faces:
-            aspect_ratio = w / h
-            if 0.7 <= aspect_ratio <= 1.4:
-                overlap = False
-                for (fx, fy, fw, fh) in faces:
-                    overlap_x = max(0, min(x + w, fx + fw) - max(x, fx))
-                    overlap_y = max(0, min(y + h, fy + fh) - max(y, fy))
-                    overlap_area = overlap_x * overlap_y
-                    face_area = w * h
-                    
-                    if overlap_area > 0.3 * face_area:
-                        overlap = True
-                        break
-                
-                if not overlap:
-                    faces.append((x, y, w, h))
-        
-        for (x, y, w, h) in faces:
-            cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
-            cv2.putText(frame, 'Face', (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-        
-        face_count = len(faces)
-        count_text = f"People detected: {face_count}"
-        text_size = cv2.getTextSize(count_text, cv2.FONT_HERSHEY_SIMPLEX, 0.8, 2)[0]
-        cv2.rectangle(frame, (10, 10), (text_size[0] + 20, text_size[1] + 20), (0, 0, 0), -1)
-        cv2.putText(frame, count_text, (15, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
-        cv2.imshow('Face Detection App', frame)
-        
-        key = cv2.waitKey(1) & 0xFF
-        if key == ord('q') or key == 27:
-            break
-    
+    if server is not None:
+        print(f"Serving http://{args.host}:{args.serve}/ (stream.mjpg, detections, stats); press Ctrl+C to stop")
+    else:
+        print("Press 'q' to quit, 'ESC' to exit")
+
+    events = EventWriter(args.events_dir) if args.events_dir else None
+    try:
+        if args.pipeline:
+            run_pipeline(cap, args.workers, args.report_interval, make_detector, events, server)
+        else:
+            tracker = None
+            if args.track_every:
+                tracker = KeyframeTracker(detector.cascades, args.track_every, args.detect_scale)
+            profiler = FrameProfiler() if args.profile else None
+            id_tracker = IdTracker(args.id_similarity, args.id_match) if args.ids else None
+            run_sequential(cap, detector, tracker, events, server, args.report_interval, profiler,
+                           id_tracker, max(1, args.id_detect_every))
+    except KeyboardInterrupt:
+        if server is None:
+            raise
+        print("\nStopping server")
+    finally:
+        if server is not None:
+            print(server.broadcaster.report())
+            server.stop()
+        if events is not None:
+            events.close()
+            print(f"Recorded {events.written} frames to {args.events_dir} ({events.dropped} dropped, "
+                  f"{events.lost} lost to write errors)")
+            if events.last_error:
+                print(f"Error: Last event write failed: {events.last_error}")
+
     cap.release()
-    cv2.destroyAllWindows()
+    if server is None:
+        cv2.destroyAllWindows()
     print("Face Detection App Closed")
 
 if __name__ == "__main__":
@@ -93,4 +254,4 @@ if __name__ == "__main__":
         print("\nApplication interrupted by user")
         cv2.destroyAllWindows()
     except Exception as e:
-        print(f"An error occurred: {e}")
\ No newline at end of file
+        print(f"An error occurred: {e}")
@@ -0,0 +1,217 @@
+import cv2
+import numpy as np
+
+from detectors import FaceDetector
+from nms import as_boxes, nms
+
+
+class MotionGate:
+    """Cheap frame-difference check run before detection.
+
+    Frames are shrunk to `scale`, blurred and compared with the reference
+    frame from the last detection pass. Pixels differing by more than
+    `threshold` grey levels count as changed; below `min_changed` (fraction of
+    the frame) the scene is treated as static. Otherwise the changed pixels
+    are grouped into padded regions of interest, or None when they cover so
+    much of the frame that a full pass is cheaper.
+    """
+
+    def __init__(self, threshold=25, min_changed=0.002, scale=0.25, blur=5, margin=0.5, max_roi_fraction=0.5):
+        self.threshold = threshold
+        self.min_changed = min_changed
+        self.scale = scale
+        self.blur = blur
+        self.margin = margin
+        self.max_roi_fraction = max_roi_fraction
+        self._reference = None
+        self._current = None
+        self._kernel = np.ones((3, 3), np.uint8)
+
+    def check(self, frame):
+        """(moved, regions): regions are full-resolution boxes, or None for the whole frame"""
+        small = cv2.resize(frame, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        small = cv2.GaussianBlur(small, (self.blur, self.blur), 0)
+        self._current = small
+
+        if self._reference is None or self._reference.shape != small.shape:
+            return True, None
+
+        diff = cv2.absdiff(small, self._reference)
+        _, mask = cv2.threshold(diff, self.threshold, 255, cv2.THRESH_BINARY)
+        if cv2.countNonZero(mask) < self.min_changed * mask.size:
+            return False, []
+
+        mask = cv2.dilate(mask, self._kernel, iterations=2)
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        frame_h, frame_w = frame.shape[:2]
+        regions = []
+        for contour in contours:
+            x, y, w, h = cv2.boundingRect(contour)
+            # Back to full resolution, padded so a face entering the region fits
+            pad_x, pad_y = w * self.margin, h * self.margin
+            x0 = max(0, int((x - pad_x) / self.scale))
+            y0 = max(0, int((y - pad_y) / self.scale))
+            x1 = min(frame_w, int((x + w + pad_x) / self.scale))
+            y1 = min(frame_h, int((y + h + pad_y) / self.scale))
+            regions.append((x0, y0, x1 - x0, y1 - y0))
+
+        regions = _union_overlapping(regions)
+        if sum(w * h for _, _, w, h in regions) > self.max_roi_fraction * frame_w * frame_h:
+            return True, None
+        return True, regions
+
+    def accept(self):
+        """Make the last checked frame the reference (call after detecting on it)"""
+        self._reference = self._current
+
+
+def _union_overlapping(regions):
+    # Repeatedly merge intersecting rectangles so each area is detected once
+    merged = list(regions)
+    changed = True
+    while changed:
+        changed = False
+        result = []
+        for x, y, w, h in merged:
+            for i, (rx, ry, rw, rh) in enumerate(result):
+                if x < rx + rw and rx < x + w and y < ry + rh and ry < y + h:
+                    nx, ny = min(x, rx), min(y, ry)
+                    result[i] = (nx, ny, max(x + w, rx + rw) - nx, max(y + h, ry + rh) - ny)
+                    changed = True
+                    break
+            else:
+                result.append((x, y, w, h))
+        merged = result
+    return merged
+
+
+def _contained(faces, regions):
+    # Mask of faces lying entirely inside one of the regions
+    faces = faces.reshape(-1, 4)
+    regions = np.asarray(regions, dtype=np.int64).reshape(-1, 4)
+    starts_inside = faces[:, None, :2] >= regions[None, :, :2]
+    ends_inside = faces[:, None, :2] + faces[:, None, 2:] <= regions[None, :, :2] + regions[None, :, 2:]
+    return (starts_inside & ends_inside).all(axis=2).any(axis=1)
+
+
+def _intersects(box, other):
+    x, y, w, h = box
+    ox, oy, ow, oh = other
+    return x < ox + ow and ox < x + w and y < oy + oh and oy < y + h
+
+
+def _min_face_size(detector):
+    # Cascade-based detectors expose their detectMultiScale parameters
+    params = getattr(detector, 'base_params', None) or getattr(detector, 'params', None) or {}
+    return max(params.get('minSize', (0, 0)))
+
+
+def grow_regions(regions, faces, min_size, frame_shape, context=0.25):
+    """Grow motion regions so each covers every previous face it touches (plus
+    some context) and is at least `min_size` on each side; overlapping
+    regions are merged. Repeats until stable, since growing can reach more faces."""
+    frame_h, frame_w = frame_shape[:2]
+    faces = [tuple(face) for face in faces.tolist()]
+    while True:
+        grown = []
+        for x0, y0, w, h in regions:
+            x1, y1 = x0 + w, y0 + h
+            for fx, fy, fw, fh in faces:
+                if _intersects((x0, y0, w, h), (fx, fy, fw, fh)):
+                    pad_x, pad_y = int(fw * context), int(fh * context)
+                    x0, y0 = min(x0, fx - pad_x), min(y0, fy - pad_y)
+                    x1, y1 = max(x1, fx + fw + pad_x), max(y1, fy + fh + pad_y)
+            # Centre-grow up to the minimum size, then clip to the frame
+            grow_x, grow_y = max(0, min_size - (x1 - x0)), max(0, min_size - (y1 - y0))
+            x0, x1 = x0 - grow_x // 2, x1 + grow_x - grow_x // 2
+            y0, y1 = y0 - grow_y // 2, y1 + grow_y - grow_y // 2
+            x0, y0 = max(0, x0), max(0, y0)
+            x1, y1 = min(frame_w, x1), min(frame_h, y1)
+            grown.append((x0, y0, x1 - x0, y1 - y0))
+        grown = _union_overlapping(grown)
+        if sorted(grown) == sorted(regions):
+            return grown
+        regions = grown
+
+
+class MotionGatedDetector(FaceDetector):
+    """Wraps a detector so static frames reuse the previous faces.
+
+    With motion confined to a few regions only those crops are detected.
+    Regions are first grown to cover the previous faces they touch and to
+    the detector's minimum face size, so a face crossed by a thin band of
+    change is searched for as a whole; previous faces are only replaced
+    when they lie entirely inside a searched region, and carried over
+    otherwise. When grown regions are too big or too small to search, the
+    whole frame is detected instead.
+    """
+
+    def __init__(self, detector, gate=None, min_region=48):
+        super().__init__()
+        self.detector = detector
+        self.gate = gate or MotionGate()
+        self.min_region = max(min_region, _min_face_size(detector))
+        self.load_time = detector.load_time
+        self.name = f"{detector.name}+motion"
+        self._faces = np.empty((0, 4), np.int32)
+        self.frames = 0
+        self.skipped = 0
+        self.partial = 0
+
+    def detect(self, frame):
+        self.frames += 1
+        moved, regions = self.gate.check(frame)
+
+        if not moved:
+            self.skipped += 1
+            return self._faces
+
+        if regions is not None:
+            regions = grow_regions(regions, self._faces, self.min_region, frame.shape)
+            frame_h, frame_w = frame.shape[:2]
+            too_small = any(w < self.min_region or h < self.min_region for _, _, w, h in regions)
+            too_big = sum(w * h for _, _, w, h in regions) > self.gate.max_roi_fraction * frame_w * frame_h
+            if too_small or too_big:
+                regions = None
+
+        if regions is None:
+            faces = self.detector.detect(frame)
+        else:
+            self.partial += 1
+            parts = [self._faces[~_contained(self._faces, regions)]]
+            for x, y, w, h in regions:
+                found = self.detector.detect(frame[y:y + h, x:x + w])
+                parts.append(found + np.array((x, y, 0, 0), np.int32))
+            faces = np.concatenate(parts)
+            if len(faces):
+                faces = faces[np.sort(nms(as_boxes(faces), threshold=0.3, metric='iomin'))]
+
+        self.gate.accept()
+        self._faces = faces
+        return faces
+
+    @property
+    def skip_fraction(self):
+        return self.skipped / self.frames if self.frames else 0.0
+
+    def report(self):
+        full = self.frames - self.skipped - self.partial
+        return (f"Motion gate: skipped {self.skipped}/{self.frames} frames ({self.skip_fraction:.0%}), "
+                f"{self.partial} region-only passes, {full} full passes")
+
+
+def add_motion_arguments(parser):
+    parser.add_argument('--motion-gate', action='store_true',
+                        help="skip detection on static frames and only search changed regions")
+    parser.add_argument('--motion-threshold', type=int, default=25,
+                        help="grey-level difference that counts as a changed pixel")
+    parser.add_argument('--motion-min-changed', type=float, default=0.002,
+                        help="fraction of changed pixels below which a frame is static")
+    parser.add_argument('--motion-scale', type=float, default=0.25,
+                        help="frame scale used for the difference check")
+
+
+def gate_from_args(args):
+    return MotionGate(args.motion_threshold, args.motion_min_changed, args.motion_scale)
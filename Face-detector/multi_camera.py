@@ -0,0 +1,279 @@
+import argparse
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from detection import draw_faces
+from detectors import add_backend_arguments, backend_options, create_detector
+
+
+class SyntheticSource:
+    """Camera stand-in for testing: a moving picture (or plain block) at a fixed rate.
+
+    Spec: synthetic[:WIDTHxHEIGHT][@FPS][:IMAGE_PATH]
+    e.g. "synthetic", "synthetic:1280x720@30", "synthetic:640x480@15:face.png"
+    """
+
+    def __init__(self, spec):
+        parts = spec.split(':', 2)
+        size = parts[1] if len(parts) > 1 and parts[1] else '640x480@15'
+        size, _, fps = size.partition('@')
+        self.width, self.height = (int(v) for v in size.split('x'))
+        self.interval = 1.0 / float(fps or 15)
+        self.sprite = None
+        if len(parts) > 2:
+            self.sprite = cv2.imread(parts[2])
+        if self.sprite is None:
+            self.sprite = np.full((120, 120, 3), 200, dtype=np.uint8)
+        self.sprite = self.sprite[:self.height, :self.width]
+        self._frame_index = 0
+        self._next_time = time.perf_counter()
+
+    def isOpened(self):
+        return True
+
+    def read(self):
+        delay = self._next_time - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        self._next_time = max(self._next_time + self.interval, time.perf_counter())
+
+        frame = np.full((self.height, self.width, 3), 90, dtype=np.uint8)
+        sprite_h, sprite_w = self.sprite.shape[:2]
+        span_x = max(1, self.width - sprite_w)
+        x = (self._frame_index * 4) % span_x
+        y = (self.height - sprite_h) // 2
+        frame[y:y + sprite_h, x:x + sprite_w] = self.sprite
+        self._frame_index += 1
+        return True, frame
+
+    def release(self):
+        pass
+
+
+class PacedFileSource:
+    """Video file replayed at its own frame rate, so it behaves like a live feed"""
+
+    def __init__(self, path):
+        self.cap = cv2.VideoCapture(path)
+        self.interval = 1.0 / (self.cap.get(cv2.CAP_PROP_FPS) or 25)
+        self._next_time = time.perf_counter()
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        delay = self._next_time - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        self._next_time = max(self._next_time + self.interval, time.perf_counter())
+        return self.cap.read()
+
+    def release(self):
+        self.cap.release()
+
+
+def open_source(spec):
+    """Device index, synthetic stand-in, video file, or stream URL"""
+    if spec.isdigit():
+        return cv2.VideoCapture(int(spec))
+    if spec.startswith('synthetic'):
+        return SyntheticSource(spec)
+    if os.path.isfile(spec):
+        return PacedFileSource(spec)
+    return cv2.VideoCapture(spec)
+
+
+class Feed:
+    """One input source with a single-slot mailbox holding its newest frame"""
+
+    def __init__(self, index, spec, cap):
+        self.index = index
+        self.spec = spec
+        self.cap = cap
+        self.pending = None
+        self.busy = False
+        self.finished = False
+        self.captured = 0
+        self.processed = 0
+        self.dropped = 0
+        self.last_result = None
+        self.started = time.perf_counter()
+
+    @property
+    def fps(self):
+        elapsed = time.perf_counter() - self.started
+        return self.processed / elapsed if elapsed else 0.0
+
+    @property
+    def drop_rate(self):
+        return self.dropped / self.captured if self.captured else 0.0
+
+
+class FairScheduler:
+    """Hands frames to detector workers round-robin across feeds.
+
+    Each feed has at most one frame in flight and one waiting; a newer frame
+    replaces the waiting one (counted as a drop). Workers scan feeds starting
+    after the last one served, so a fast camera cannot starve a slow one.
+    """
+
+    def __init__(self, feeds):
+        self.feeds = feeds
+        self._cursor = 0
+        self._cond = threading.Condition()
+        self.closed = False
+
+    def offer(self, feed, frame):
+        with self._cond:
+            feed.captured += 1
+            if feed.pending is not None:
+                feed.dropped += 1
+            feed.pending = frame
+            self._cond.notify()
+
+    def next_job(self):
+        with self._cond:
+            while not self.closed:
+                for step in range(len(self.feeds)):
+                    feed = self.feeds[(self._cursor + step) % len(self.feeds)]
+                    if feed.pending is not None and not feed.busy:
+                        self._cursor = (feed.index + 1) % len(self.feeds)
+                        frame, feed.pending = feed.pending, None
+                        feed.busy = True
+                        return feed, frame
+                self._cond.wait(0.1)
+            return None
+
+    def done(self, feed, frame, faces):
+        with self._cond:
+            feed.busy = False
+            feed.processed += 1
+            feed.last_result = (frame, faces)
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+
+class MultiCameraDetector:
+    """Ingests N sources in one process and detects on a shared worker pool"""
+
+    def __init__(self, specs, detector_factory, workers=2):
+        self.feeds = []
+        for spec in specs:
+            cap = open_source(spec)
+            if not cap.isOpened():
+                raise RuntimeError(f"Could not open source: {spec}")
+            self.feeds.append(Feed(len(self.feeds), spec, cap))
+        self.detector_factory = detector_factory
+        self.workers = workers
+        self.scheduler = FairScheduler(self.feeds)
+        self.stop_event = threading.Event()
+        self._threads = []
+
+    def start(self):
+        # Detectors are loaded once per worker, not once per camera.
+        # Raises RuntimeError if one cannot be loaded.
+        detectors = [self.detector_factory() for _ in range(self.workers)]
+        for feed in self.feeds:
+            self._threads.append(threading.Thread(target=self._capture_loop, args=(feed,), daemon=True))
+        for detector in detectors:
+            self._threads.append(threading.Thread(target=self._detect_loop, args=(detector,), daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def _capture_loop(self, feed):
+        while not self.stop_event.is_set():
+            ret, frame = feed.cap.read()
+            if not ret:
+                feed.finished = True
+                return
+            self.scheduler.offer(feed, frame)
+
+    def _detect_loop(self, detector):
+        while True:
+            job = self.scheduler.next_job()
+            if job is None:
+                return
+            feed, frame = job
+            faces = detector.detect(frame)
+            draw_faces(frame, faces)
+            self.scheduler.done(feed, frame, faces)
+
+    @property
+    def all_finished(self):
+        return all(feed.finished and feed.pending is None and not feed.busy for feed in self.feeds)
+
+    def report(self):
+        lines = []
+        for feed in self.feeds:
+            lines.append(
+                f"[{feed.index}] {feed.spec}: {feed.fps:.1f} FPS, captured {feed.captured}, "
+                f"processed {feed.processed}, dropped {feed.dropped} ({feed.drop_rate:.0%})"
+            )
+        return "\n".join(lines)
+
+    def stop(self):
+        self.stop_event.set()
+        self.scheduler.close()
+        for thread in self._threads:
+            thread.join(timeout=1)
+        for feed in self.feeds:
+            feed.cap.release()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Face detection on several cameras with one shared worker pool")
+    parser.add_argument('sources', nargs='+',
+                        help="camera index, video file, stream URL, or synthetic[:WxH@FPS][:image]")
+    parser.add_argument('--workers', type=int, default=2, help="detector threads shared by all feeds")
+    parser.add_argument('--show', action='store_true', help="open one window per feed")
+    parser.add_argument('--report-interval', type=float, default=5.0)
+    parser.add_argument('--duration', type=float, help="stop after this many seconds")
+    add_backend_arguments(parser)
+    args = parser.parse_args()
+
+    options = backend_options(args)
+    try:
+        detector = MultiCameraDetector(args.sources, lambda: create_detector(args.backend, **options), args.workers)
+        detector.start()
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        return
+
+    print(f"Multi-camera detection started on {len(detector.feeds)} feeds with {args.workers} workers")
+    started = time.perf_counter()
+    next_report = started + args.report_interval
+    try:
+        while not detector.all_finished:
+            if args.duration and time.perf_counter() - started >= args.duration:
+                break
+            if args.show:
+                for feed in detector.feeds:
+                    if feed.last_result is not None:
+                        cv2.imshow(f"Feed {feed.index}: {feed.spec}", feed.last_result[0])
+                key = cv2.waitKey(1) & 0xFF
+                if key == ord('q') or key == 27:
+                    break
+            else:
+                time.sleep(0.05)
+            if time.perf_counter() >= next_report:
+                print(detector.report())
+                next_report += args.report_interval
+    except KeyboardInterrupt:
+        print("\nInterrupted")
+    finally:
+        detector.stop()
+        if args.show:
+            cv2.destroyAllWindows()
+    print(detector.report())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+import numpy as np
+
+
+def as_boxes(boxes):
+    """Any detector output (list of tuples, Nx4 array, empty tuple) as an (N, 4) float array"""
+    return np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+
+
+def aspect_mask(boxes, low=0.7, high=1.4):
+    boxes = as_boxes(boxes)
+    ratio = boxes[:, 2] / np.maximum(boxes[:, 3], 1e-6)
+    return (ratio >= low) & (ratio <= high)
+
+
+def _overlap(a, b, metric):
+    # a: (..., N, 4), b: (..., M, 4) -> (..., N, M); leading dims broadcast
+    ax0, ay0 = a[..., :, None, 0], a[..., :, None, 1]
+    ax1, ay1 = ax0 + a[..., :, None, 2], ay0 + a[..., :, None, 3]
+    bx0, by0 = b[..., None, :, 0], b[..., None, :, 1]
+    bx1, by1 = bx0 + b[..., None, :, 2], by0 + b[..., None, :, 3]
+    inter_w = np.clip(np.minimum(ax1, bx1) - np.maximum(ax0, bx0), 0, None)
+    inter_h = np.clip(np.minimum(ay1, by1) - np.maximum(ay0, by0), 0, None)
+    inter = inter_w * inter_h
+    area_a = a[..., :, None, 2] * a[..., :, None, 3]
+    area_b = b[..., None, :, 2] * b[..., None, :, 3]
+    if metric == 'iomin':
+        denom = np.minimum(area_a, area_b)
+    else:
+        denom = area_a + area_b - inter
+    return inter / np.maximum(denom, 1e-6)
+
+
+def overlap_matrix(a, b, metric='iou'):
+    """Pairwise overlap between (N, 4) and (M, 4) xywh boxes.
+
+    metric 'iou' is intersection over union; 'iomin' is intersection over the
+    smaller box, which also catches a small box nested inside a large one.
+    """
+    return _overlap(as_boxes(a), as_boxes(b), metric)
+
+
+def iou_matrix(a, b):
+    return overlap_matrix(a, b, 'iou')
+
+
+def _order(boxes, scores):
+    # Score first, then area, then position: the result never depends on input order
+    area = boxes[:, 2] * boxes[:, 3]
+    return np.lexsort((boxes[:, 1], boxes[:, 0], -area, -scores))
+
+
+def _sweep(suppresses, keep):
+    # Greedy pass over rank-ordered boxes, vectorized across the leading axis:
+    # once box i is kept it removes every lower-ranked box it overlaps
+    for i in range(keep.shape[-1] - 1):
+        if not keep[..., i].any():
+            continue
+        keep[..., i + 1:] &= ~(suppresses[..., i, i + 1:] & keep[..., i, None])
+    return keep
+
+
+def nms(boxes, scores=None, threshold=0.3, metric='iou'):
+    """Indices of boxes kept by greedy non-maximum suppression, best first.
+
+    Boxes are ranked once (by score, or by area when no scores are given, with
+    ties broken by position) so the result never depends on input order. The
+    pairwise overlap matrix is computed in one vectorized step.
+    """
+    return batched_nms([boxes], None if scores is None else [scores], threshold, metric, sort=False)[0]
+
+
+def batched_nms(frames, scores=None, threshold=0.3, metric='iou', sort=True):
+    """Run NMS over many frames at once; returns one kept-index array per frame.
+
+    Frames are padded to the same box count and stacked, so the overlap
+    matrices for every frame come out of a single vectorized call and the
+    greedy sweep advances all frames together.
+    """
+    arrays = [as_boxes(boxes) for boxes in frames]
+    counts = [len(boxes) for boxes in arrays]
+    width = max(counts, default=0)
+    if width == 0:
+        return [np.empty(0, dtype=np.intp) for _ in arrays]
+
+    ranked = np.zeros((len(arrays), width, 4), dtype=np.float32)
+    keep = np.zeros((len(arrays), width), dtype=bool)
+    orders = []
+    for i, boxes in enumerate(arrays):
+        if scores is None:
+            frame_scores = boxes[:, 2] * boxes[:, 3]
+        else:
+            frame_scores = np.asarray(scores[i], dtype=np.float32).reshape(-1)
+        order = _order(boxes, frame_scores)
+        orders.append(order)
+        ranked[i, :len(order)] = boxes[order]
+        keep[i, :len(order)] = True
+
+    keep = _sweep(_overlap(ranked, ranked, metric) > threshold, keep)
+    kept = [order[keep[i, :len(order)]] for i, order in enumerate(orders)]
+    return [np.sort(k) for k in kept] if sort else kept
+
+
+def weighted_box_fusion(detector_boxes, detector_scores=None, weights=None, threshold=0.55, metric='iou'):
+    """Fuse boxes from several detectors into score-weighted average boxes.
+
+    Boxes from all detectors are ranked once and assigned to the best
+    overlapping cluster (or start a new one). Each cluster becomes the
+    score-weighted mean of its members; its score is the mean member score
+    scaled by the share of detectors that agreed on it.
+
+    Returns (boxes, scores) as (K, 4) and (K,) float arrays.
+    """
+    num_detectors = len(detector_boxes)
+    weights = np.ones(num_detectors, dtype=np.float32) if weights is None else np.asarray(weights, dtype=np.float32)
+
+    boxes, scores, sources = [], [], []
+    for i, det_boxes in enumerate(detector_boxes):
+        det_boxes = as_boxes(det_boxes)
+        if detector_scores is None:
+            det_scores = np.ones(len(det_boxes), dtype=np.float32)
+        else:
+            det_scores = np.asarray(detector_scores[i], dtype=np.float32).reshape(-1)
+        boxes.append(det_boxes)
+        scores.append(det_scores * weights[i])
+        sources.append(np.full(len(det_boxes), i))
+    boxes = np.concatenate(boxes) if boxes else np.empty((0, 4), np.float32)
+    scores = np.concatenate(scores) if scores else np.empty(0, np.float32)
+    sources = np.concatenate(sources) if sources else np.empty(0, int)
+    if len(boxes) == 0:
+        return np.empty((0, 4), np.float32), np.empty(0, np.float32)
+
+    fused = np.empty((0, 4), np.float32)
+    members = []
+    for index in _order(boxes, scores):
+        if len(fused):
+            overlap = overlap_matrix(boxes[index:index + 1], fused, metric)[0]
+            best = int(np.argmax(overlap))
+            if overlap[best] > threshold:
+                members[best].append(index)
+                weight = scores[members[best]]
+                fused[best] = (boxes[members[best]] * weight[:, None]).sum(0) / max(weight.sum(), 1e-6)
+                continue
+        members.append([index])
+        fused = np.vstack([fused, boxes[index:index + 1]])
+
+    fused_scores = np.array([
+        scores[group].mean() * min(len(set(sources[group])), num_detectors) / num_detectors
+        for group in members
+    ], dtype=np.float32)
+    order = _order(fused, fused_scores)
+    return fused[order], fused_scores[order]
+
+
+def greedy_pairs(score, threshold):
+    """One-to-one (row, column) pairs from a score matrix, best scores first,
+    stopping once scores drop below `threshold`"""
+    score = np.array(score, dtype=np.float32)
+    pairs = []
+    if not score.size:
+        return pairs
+    for flat in np.argsort(-score, axis=None, kind='stable'):
+        r, c = divmod(int(flat), score.shape[1])
+        if not np.isfinite(score[r, c]):
+            continue  # row or column already matched
+        if score[r, c] < threshold:
+            break
+        pairs.append((r, c))
+        score[r, :] = -np.inf
+        score[:, c] = -np.inf
+    return pairs
+
+
+def match_boxes(reference, predicted, threshold=0.5):
+    """Greedy one-to-one matching by IoU, best pairs first.
+
+    Returns (matched count, summed IoU of the matches), used to score a
+    detector against labels or against another detector.
+    """
+    reference, predicted = as_boxes(reference), as_boxes(predicted)
+    if not len(reference) or not len(predicted):
+        return 0, 0.0
+    iou = iou_matrix(reference, predicted)
+    pairs = greedy_pairs(iou, threshold)
+    return len(pairs), float(sum(iou[r, p] for r, p in pairs))
@@ -0,0 +1,178 @@
+import queue
+import threading
+import time
+
+import cv2
+
+from detection import draw_faces
+
+
+class DropOldestQueue:
+    """Bounded queue that discards the oldest item instead of blocking the producer"""
+
+    def __init__(self, maxsize):
+        self._queue = queue.Queue(maxsize)
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def put(self, item):
+        with self._lock:
+            while True:
+                try:
+                    self._queue.put_nowait(item)
+                    return
+                except queue.Full:
+                    try:
+                        self._queue.get_nowait()
+                        self.dropped += 1
+                    except queue.Empty:
+                        pass
+
+    def get(self, timeout=None):
+        return self._queue.get(timeout=timeout)
+
+    def get_nowait(self):
+        return self._queue.get_nowait()
+
+
+class StageStats:
+    """Running count and latency of one pipeline stage"""
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+
+    @property
+    def mean_ms(self):
+        return self.total / self.count * 1000 if self.count else 0.0
+
+    def __str__(self):
+        return f"{self.name}: {self.count} frames, avg {self.mean_ms:.1f} ms, max {self.max * 1000:.1f} ms"
+
+
+class FacePipeline:
+    """Capture thread -> detection workers -> display, joined by bounded queues.
+
+    The capture thread never waits on detection: when workers fall behind the
+    oldest queued frame is dropped. Workers may finish out of order, so the
+    display stage only ever shows a result newer than the last one it drew.
+    """
+
+    def __init__(self, cap, detector_factory, workers=2, queue_size=2, on_result=None):
+        self.cap = cap
+        self.detector_factory = detector_factory
+        self.workers = workers
+        self.on_result = on_result
+        self.frames = DropOldestQueue(queue_size)
+        self.results = DropOldestQueue(queue_size * workers)
+        self.stats = {
+            name: StageStats(name)
+            for name in ('capture', 'detect', 'draw', 'display', 'end-to-end')
+        }
+        self.stop_event = threading.Event()
+        self.capture_error = None
+        self.detectors = []
+        self._threads = []
+        self._last_shown = -1
+        self._shown = 0
+        self._started = None
+
+    def start(self):
+        # Each worker owns its detector; classifiers are not shared across threads.
+        # Raises RuntimeError if a detector cannot be loaded.
+        self.detectors = [self.detector_factory() for _ in range(self.workers)]
+
+        self._started = time.perf_counter()
+        self._threads.append(threading.Thread(target=self._capture_loop, daemon=True))
+        for detector in self.detectors:
+            self._threads.append(threading.Thread(target=self._detect_loop, args=(detector,), daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def _capture_loop(self):
+        seq = 0
+        while not self.stop_event.is_set():
+            start = time.perf_counter()
+            ret, frame = self.cap.read()
+            if not ret:
+                self.capture_error = "Error: Failed to capture frame"
+                self.stop_event.set()
+                return
+            self.stats['capture'].add(time.perf_counter() - start)
+            self.frames.put((seq, start, frame))
+            seq += 1
+
+    def _detect_loop(self, detector):
+        while not self.stop_event.is_set():
+            try:
+                seq, captured, frame = self.frames.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            start = time.perf_counter()
+            faces = detector.detect(frame)
+            detected = time.perf_counter()
+            if self.on_result is not None:
+                # Called from the worker thread for every detected frame, shown or not
+                self.on_result(seq, faces)
+            draw_faces(frame, faces)
+            self.stats['detect'].add(detected - start)
+            self.stats['draw'].add(time.perf_counter() - detected)
+            self.results.put((seq, captured, frame, faces))
+
+    def latest(self):
+        """Newest annotated result not yet shown, or None"""
+        newest = None
+        while True:
+            try:
+                item = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if item[0] > self._last_shown and (newest is None or item[0] > newest[0]):
+                newest = item
+        if newest is not None:
+            self._last_shown = newest[0]
+        return newest
+
+    def show(self, window_name):
+        return self.deliver(lambda frame, faces: cv2.imshow(window_name, frame))
+
+    def deliver(self, sink):
+        """Pass the newest result to sink(frame, faces); False if there was nothing new"""
+        item = self.latest()
+        if item is None:
+            return False
+        seq, captured, frame, faces = item
+        start = time.perf_counter()
+        sink(frame, faces)
+        now = time.perf_counter()
+        self.stats['display'].add(now - start)
+        self.stats['end-to-end'].add(now - captured)
+        self._shown += 1
+        return True
+
+    @property
+    def fps(self):
+        elapsed = time.perf_counter() - self._started if self._started else 0
+        return self._shown / elapsed if elapsed else 0.0
+
+    def report(self):
+        lines = [str(stats) for stats in self.stats.values()]
+        lines.append(f"dropped before detection: {self.frames.dropped}, "
+                     f"dropped before display: {self.results.dropped}")
+        lines.append(f"displayed FPS: {self.fps:.1f}")
+        return "\n".join(lines)
+
+    def stop(self):
+        self.stop_event.set()
+        for thread in self._threads:
+            thread.join(timeout=1)
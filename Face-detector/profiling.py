@@ -0,0 +1,64 @@
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+
+class FrameProfiler:
+    """Time and memory allocated per stage of every frame.
+
+    Allocation is the tracemalloc peak reached inside a stage above what was
+    already allocated when it started, so short-lived temporaries that are
+    freed before the stage ends still count. NumPy and OpenCV output arrays
+    are traced; tracing itself slows the loop down, so only use it to compare
+    runs against each other.
+    """
+
+    def __init__(self, stream=sys.stderr, every=1):
+        self.stream = stream
+        self.every = every
+        self.frames = 0
+        self.totals = {}
+        self._frame = {}
+        tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            allocated = tracemalloc.get_traced_memory()[1] - before
+            seconds, total = self._frame.get(name, (0.0, 0))
+            self._frame[name] = (seconds + elapsed, total + allocated)
+
+    def end_frame(self):
+        self.frames += 1
+        for name, (seconds, allocated) in self._frame.items():
+            total_seconds, total_allocated = self.totals.get(name, (0.0, 0))
+            self.totals[name] = (total_seconds + seconds, total_allocated + allocated)
+        if self.every and self.frames % self.every == 0:
+            print(f"frame {self.frames}: " + self._format(self._frame, 1), file=self.stream)
+        self._frame = {}
+
+    def summary(self):
+        if not self.frames:
+            return "No frames profiled"
+        return f"Average over {self.frames} frames: " + self._format(self.totals, self.frames)
+
+    def _format(self, stages, frames):
+        return ", ".join(
+            f"{name} {seconds / frames * 1000:.1f} ms / {allocated / frames / 1024:.0f} KiB"
+            for name, (seconds, allocated) in stages.items()
+        )
+
+    def close(self):
+        tracemalloc.stop()
+
+
+def stage(profiler, name):
+    """profiler.stage(name), or a no-op context when profiling is off"""
+    return profiler.stage(name) if profiler is not None else nullcontext()
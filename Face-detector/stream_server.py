@@ -0,0 +1,207 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import cv2
+
+BOUNDARY = 'frame'
+
+INDEX_PAGE = b"""<!doctype html>
+<title>Face Detection</title>
+<img src="/stream.mjpg">
+<p><a href="/detections">/detections</a> | <a href="/stats">/stats</a></p>
+"""
+
+
+class ClientStats:
+    """Delivery counters for one MJPEG client.
+
+    `skipped` counts frames that were replaced by a newer one before this
+    client finished writing the previous frame, i.e. how far it falls behind.
+    """
+
+    def __init__(self, address):
+        self.address = f"{address[0]}:{address[1]}"
+        self.connected = time.time()
+        self.sent = 0
+        self.skipped = 0
+        self.bytes = 0
+        self.write_time = 0.0
+
+    def snapshot(self):
+        offered = self.sent + self.skipped
+        return {
+            'client': self.address,
+            'seconds': round(time.time() - self.connected, 1),
+            'sent': self.sent,
+            'skipped': self.skipped,
+            'skip_rate': round(self.skipped / offered, 3) if offered else 0.0,
+            'avg_write_ms': round(self.write_time / self.sent * 1000, 2) if self.sent else 0.0,
+            'kbytes': self.bytes // 1024,
+        }
+
+
+class FrameBroadcaster:
+    """Holds the newest annotated frame as JPEG plus its detections.
+
+    Each published frame is encoded once (and only while a stream client is
+    connected); every client reads the same bytes. Clients wait for a newer
+    sequence number, so a slow client just skips frames instead of queueing
+    them or holding up capture.
+    """
+
+    def __init__(self, quality=80):
+        self.encode_params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+        self._condition = threading.Condition()
+        self._seq = 0
+        self._jpeg = None
+        self._detections = {'seq': 0, 'time': None, 'count': 0, 'faces': []}
+        self.clients = []
+        self.encoded = 0
+        self.closed = False
+
+    def publish(self, frame, faces, ids=None):
+        detections = {
+            'seq': self._seq + 1,
+            'time': time.time(),
+            'count': len(faces),
+            'faces': [[int(v) for v in face] for face in faces],
+        }
+        if ids is not None:
+            detections['ids'] = [int(face_id) for face_id in ids]
+        jpeg = None
+        if self.clients:
+            ok, encoded = cv2.imencode('.jpg', frame, self.encode_params)
+            if ok:
+                jpeg = encoded.tobytes()
+                self.encoded += 1
+        with self._condition:
+            self._seq += 1
+            self._jpeg = jpeg
+            self._detections = detections
+            self._condition.notify_all()
+
+    @property
+    def detections(self):
+        with self._condition:
+            return self._detections
+
+    def wait_frame(self, after, timeout=1.0):
+        """(seq, jpeg) for the newest frame after `after`, or None on timeout/close"""
+        with self._condition:
+            self._condition.wait_for(lambda: self.closed or (self._seq > after and self._jpeg is not None), timeout)
+            if self.closed or self._seq <= after or self._jpeg is None:
+                return None
+            return self._seq, self._jpeg
+
+    def add_client(self, address):
+        client = ClientStats(address)
+        with self._condition:
+            self.clients = self.clients + [client]
+        return client
+
+    def remove_client(self, client):
+        with self._condition:
+            self.clients = [c for c in self.clients if c is not client]
+
+    def stats(self):
+        return {
+            'frames': self._seq,
+            'encoded': self.encoded,
+            'clients': [client.snapshot() for client in self.clients],
+        }
+
+    def report(self):
+        lines = [f"Stream: {self._seq} frames, {self.encoded} encoded, {len(self.clients)} clients"]
+        for client in self.clients:
+            s = client.snapshot()
+            lines.append(f"  {s['client']}: sent {s['sent']}, skipped {s['skipped']} ({s['skip_rate']:.0%}), "
+                         f"avg write {s['avg_write_ms']:.1f} ms")
+        return "\n".join(lines)
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+
+class StreamRequestHandler(BaseHTTPRequestHandler):
+    server_version = 'FaceStream/1.0'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == '/':
+            self._send(200, 'text/html', INDEX_PAGE)
+        elif path == '/stream.mjpg':
+            self._stream()
+        elif path == '/detections':
+            self._send_json(self.server.broadcaster.detections)
+        elif path == '/stats':
+            self._send_json(self.server.broadcaster.stats())
+        else:
+            self._send(404, 'application/json', b'{"error": "Not found"}')
+
+    def _stream(self):
+        broadcaster = self.server.broadcaster
+        self.send_response(200)
+        self.send_header('Content-Type', f'multipart/x-mixed-replace; boundary={BOUNDARY}')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+
+        client = broadcaster.add_client(self.client_address)
+        last = 0
+        try:
+            while not broadcaster.closed:
+                item = broadcaster.wait_frame(last)
+                if item is None:
+                    continue
+                seq, jpeg = item
+                if last:
+                    client.skipped += seq - last - 1
+                start = time.perf_counter()
+                self.wfile.write(f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                                 f"Content-Length: {len(jpeg)}\r\n\r\n".encode('ascii'))
+                self.wfile.write(jpeg)
+                self.wfile.write(b'\r\n')
+                client.write_time += time.perf_counter() - start
+                client.sent += 1
+                client.bytes += len(jpeg)
+                last = seq
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            broadcaster.remove_client(client)
+
+    def _send_json(self, payload):
+        self._send(200, 'application/json', json.dumps(payload).encode('utf-8'))
+
+    def _send(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StreamServer(ThreadingHTTPServer):
+    """Serves / (viewer page), /stream.mjpg, /detections and /stats from a background thread"""
+
+    daemon_threads = True
+
+    def __init__(self, address, quality=80):
+        super().__init__(address, StreamRequestHandler)
+        self.broadcaster = FrameBroadcaster(quality)
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self.broadcaster.close()
+        self.shutdown()
+        self.server_close()
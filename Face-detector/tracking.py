@@ -0,0 +1,249 @@
+import importlib.util
+
+import cv2
+import numpy as np
+
+from detection import DETECT_PARAMS, detect_faces
+from nms import as_boxes, greedy_pairs, iou_matrix
+
+# scipy is optional and slow to import, so it is only loaded by the hungarian matcher
+HAVE_SCIPY = importlib.util.find_spec('scipy') is not None
+
+# Smallest window the bundled Haar cascades are trained on
+CASCADE_WINDOW = 24
+
+
+def scaled_params(scale, params=None):
+    """Detection parameters for a frame resized by `scale`"""
+    params = dict(params or DETECT_PARAMS)
+    min_w, min_h = params['minSize']
+    max_w, max_h = params['maxSize']
+    params['minSize'] = (max(CASCADE_WINDOW, int(min_w * scale)), max(CASCADE_WINDOW, int(min_h * scale)))
+    params['maxSize'] = (int(max_w * scale), int(max_h * scale))
+    return params
+
+
+class KeyframeTracker:
+    """Detect on a downscaled frame every N frames, track with template matching in between.
+
+    On a keyframe the cascades run on the frame shrunk by `scale`, boxes are
+    mapped back to full resolution and a template of each face is stored. On
+    the frames in between every face is searched for only in a window around
+    its last position. If any match scores below `min_confidence` the frame is
+    promoted to a keyframe and full detection runs again.
+    """
+
+    def __init__(self, cascades, detect_every=5, scale=0.5, min_confidence=0.6, search_margin=0.5, params=None):
+        self.cascades = cascades
+        self.detect_every = max(1, detect_every)
+        self.scale = scale
+        self.min_confidence = min_confidence
+        self.search_margin = search_margin
+        self.params = scaled_params(scale, params) if scale != 1 else dict(params or DETECT_PARAMS)
+        self.tracks = []  # [(x, y, w, h), template]
+        self.frame_index = 0
+        self.keyframes = 0
+        self.redetections = 0
+
+    def process(self, gray):
+        """(N, 4) array of faces (x, y, w, h) in full-resolution coordinates for this frame"""
+        due = self.frame_index % self.detect_every == 0
+        self.frame_index += 1
+
+        if not due:
+            tracked = self._track(gray)
+            if tracked is not None:
+                return tracked
+            self.redetections += 1
+        return self._detect(gray)
+
+    def _detect(self, gray):
+        self.keyframes += 1
+        if self.scale != 1:
+            small = cv2.resize(gray, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        else:
+            small = gray
+        faces = (detect_faces(small, self.cascades, self.params) / self.scale).astype(np.int32)
+        self.tracks = [(box, gray[box[1]:box[1] + box[3], box[0]:box[0] + box[2]].copy()) for box in faces.tolist()]
+        return faces
+
+    def _track(self, gray):
+        # Returns None when tracking is no longer trustworthy
+        frame_h, frame_w = gray.shape[:2]
+        faces = []
+        for (x, y, w, h), template in self.tracks:
+            if template.size == 0:
+                return None
+            mx = int(w * self.search_margin)
+            my = int(h * self.search_margin)
+            x0, y0 = max(0, x - mx), max(0, y - my)
+            x1, y1 = min(frame_w, x + w + mx), min(frame_h, y + h + my)
+            window = gray[y0:y1, x0:x1]
+            if window.shape[0] < template.shape[0] or window.shape[1] < template.shape[1]:
+                return None
+
+            scores = cv2.matchTemplate(window, template, cv2.TM_CCOEFF_NORMED)
+            _, confidence, _, (dx, dy) = cv2.minMaxLoc(scores)
+            if confidence < self.min_confidence:
+                return None
+            faces.append((x0 + dx, y0 + dy, template.shape[1], template.shape[0]))
+
+        self.tracks = [(box, template) for box, (_, template) in zip(faces, self.tracks)]
+        return np.array(faces, np.int32).reshape(-1, 4)
+
+    @property
+    def detection_ratio(self):
+        return self.keyframes / self.frame_index if self.frame_index else 0.0
+
+
+def centroid_similarity(tracks, detections):
+    """1 at identical centres, falling to 0 at a distance of one box width"""
+    tracks, detections = as_boxes(tracks), as_boxes(detections)
+    track_centres = tracks[:, :2] + tracks[:, 2:] / 2
+    det_centres = detections[:, :2] + detections[:, 2:] / 2
+    distance = np.linalg.norm(track_centres[:, None, :] - det_centres[None, :, :], axis=2)
+    scale = np.maximum(tracks[:, None, 2], detections[None, :, 2])
+    return np.clip(1 - distance / np.maximum(scale, 1e-6), 0, None)
+
+
+def hungarian_pairs(score, threshold):
+    """Globally best one-to-one assignment, keeping pairs scoring at least `threshold`"""
+    if not HAVE_SCIPY:
+        raise RuntimeError("The hungarian matcher needs scipy")
+    from scipy.optimize import linear_sum_assignment
+
+    rows, cols = linear_sum_assignment(-np.asarray(score))
+    return [(r, c) for r, c in zip(rows.tolist(), cols.tolist()) if score[r, c] >= threshold]
+
+
+SIMILARITIES = {'iou': iou_matrix, 'centroid': centroid_similarity}
+MATCHERS = {'greedy': greedy_pairs, 'hungarian': hungarian_pairs}
+
+
+class Track:
+    """One face followed over time; id stays None until the track is confirmed"""
+
+    def __init__(self, box, frame_index):
+        self.id = None
+        self.box = box.astype(np.float32)
+        self.velocity = np.zeros(2, np.float32)
+        self.hits = 1
+        self.missed = 0
+        self.first_seen = frame_index
+        self.last_box = self.box.copy()
+        self.last_update = frame_index
+
+
+class IdTracker:
+    """Gives detected faces stable IDs across frames and counts visitors.
+
+    Each update the existing tracks are moved by their velocity and
+    associated with the new boxes by IoU or centroid distance (greedy or
+    Hungarian matching). A track gets an ID after `min_hits` matches, which
+    counts as an entry and a new unique visitor; a confirmed track unmatched
+    for more than `max_missed` updates is dropped and counted as an exit.
+
+    Only tracks matched in the latest detection pass are returned; a track
+    that missed it is kept for re-association but not reported. Between
+    sparse detection passes call coast() instead of update(): those tracks
+    keep moving at their last velocity without any image work.
+    """
+
+    def __init__(self, similarity='iou', matcher='greedy', threshold=0.3, min_hits=3, max_missed=10, smoothing=0.6):
+        if similarity not in SIMILARITIES:
+            raise ValueError(f"Unknown similarity: {similarity}")
+        if matcher not in MATCHERS:
+            raise ValueError(f"Unknown matcher: {matcher}")
+        if matcher == 'hungarian' and not HAVE_SCIPY:
+            raise RuntimeError("The hungarian matcher needs scipy")
+        self.similarity = SIMILARITIES[similarity]
+        self.matcher = MATCHERS[matcher]
+        self.threshold = threshold
+        self.min_hits = min_hits
+        self.max_missed = max_missed
+        self.smoothing = smoothing
+        self.tracks = []
+        self.frame_index = 0
+        self.entries = 0
+        self.exits = 0
+        self._next_id = 1
+
+    @property
+    def unique_visitors(self):
+        return self._next_id - 1
+
+    def update(self, faces):
+        """Associate this frame's faces; returns (ids, boxes) of the confirmed tracks"""
+        self.frame_index += 1
+        self._predict()
+        faces = as_boxes(faces)
+
+        pairs = []
+        if self.tracks and len(faces):
+            score = self.similarity(np.stack([track.box for track in self.tracks]), faces)
+            pairs = self.matcher(score, self.threshold)
+
+        matched_tracks = set()
+        matched_faces = set()
+        for t, f in pairs:
+            self._correct(self.tracks[t], faces[f])
+            matched_tracks.add(t)
+            matched_faces.add(f)
+
+        for t, track in enumerate(self.tracks):
+            if t not in matched_tracks:
+                track.missed += 1
+        for f in range(len(faces)):
+            if f not in matched_faces:
+                self.tracks.append(Track(faces[f], self.frame_index))
+
+        self._expire()
+        return self.confirmed()
+
+    def coast(self):
+        """Advance tracks on a frame without detection; returns (ids, boxes)"""
+        self.frame_index += 1
+        self._predict()
+        return self.confirmed()
+
+    def confirmed(self):
+        """(ids, boxes) of confirmed tracks matched in the latest detection pass"""
+        tracks = [track for track in self.tracks if track.id is not None and track.missed == 0]
+        ids = np.array([track.id for track in tracks], dtype=np.int32)
+        boxes = np.array([track.box for track in tracks], dtype=np.float32).reshape(-1, 4)
+        return ids, np.rint(boxes).astype(np.int32)
+
+    def _predict(self):
+        for track in self.tracks:
+            track.box[:2] += track.velocity
+
+    def _correct(self, track, box):
+        corrected = self.smoothing * box + (1 - self.smoothing) * track.box
+        # Per-frame motion since the last match, which may be several coasted frames ago
+        step = (corrected[:2] - track.last_box[:2]) / max(1, self.frame_index - track.last_update)
+        track.velocity = self.smoothing * step + (1 - self.smoothing) * track.velocity
+        track.box = corrected
+        track.last_box = corrected.copy()
+        track.last_update = self.frame_index
+        track.hits += 1
+        track.missed = 0
+        if track.id is None and track.hits >= self.min_hits:
+            track.id = self._next_id
+            self._next_id += 1
+            self.entries += 1
+
+    def _expire(self):
+        alive = []
+        for track in self.tracks:
+            if track.id is None and track.missed > 0:
+                continue  # tentative tracks must be matched every update
+            if track.missed > self.max_missed:
+                self.exits += 1
+                continue
+            alive.append(track)
+        self.tracks = alive
+
+    def report(self):
+        present = sum(1 for track in self.tracks if track.id is not None and track.missed == 0)
+        return (f"Visitors: {self.unique_visitors} unique, {self.entries} entries, "
+                f"{self.exits} exits, {present} present")
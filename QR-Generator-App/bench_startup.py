@@ -0,0 +1,67 @@
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+STAGES = ("import_ms", "first_qr_ms", "next_qr_ms")
+
+
+def measure():
+    """Runs in a fresh interpreter: time the app import and the first QR codes"""
+    start = time.perf_counter()
+    # The file name has a hyphen, so it is loaded by path
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "qr-App.py")
+    spec = importlib.util.spec_from_file_location("qr_app", path)
+    spec.loader.exec_module(importlib.util.module_from_spec(spec))
+    imported = time.perf_counter()
+
+    # What the Generate button does; the first one pays for the deferred imports
+    from qr_core import build_qr, render_image
+    from PIL import ImageTk  # noqa: F401
+    render_image(build_qr("https://example.com"))
+    first = time.perf_counter()
+    render_image(build_qr("https://example.org"))
+    second = time.perf_counter()
+
+    return {
+        "import_ms": (imported - start) * 1000,
+        "first_qr_ms": (first - imported) * 1000,
+        "next_qr_ms": (second - first) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure QR app startup: imports and first generation")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to average over")
+    parser.add_argument("--output", help="append the result as a JSON line to this file")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure()))
+        return
+
+    runs = []
+    for _ in range(args.runs):
+        result = subprocess.run([sys.executable, __file__, "--child"], capture_output=True, text=True)
+        if result.returncode != 0:
+            print(f"Error: {result.stderr.strip().splitlines()[-1]}")
+            return
+        runs.append(json.loads(result.stdout))
+
+    summary = {stage: statistics.median(run[stage] for run in runs) for stage in STAGES}
+    for stage in STAGES:
+        print(f"{stage:12} {summary[stage]:8.1f} ms (median of {len(runs)})")
+
+    if args.output:
+        record = dict(summary, app="qr-App", runs=len(runs), time=time.time())
+        with open(args.output, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import argparse
+import random
+import re
+import time
+
+from qr_validation import OK, validate_batch
+
+
+def legacy_validate(data, data_type):
+    # Copy of the original QRCodeGenerator.validate_data for comparison:
+    # the URL regex is recompiled and the phone check runs two regexes per call
+    if not data.strip() and data_type != "image":
+        return False
+    if data_type == "url":
+        url_pattern = re.compile(
+            r'^https?://'
+            r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|'
+            r'localhost|'
+            r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'
+            r'(?::\d+)?'
+            r'(?:/?|[/?]\S+)$', re.IGNORECASE)
+        return bool(url_pattern.match(data.strip()))
+    if data_type == "phone":
+        clean_phone = re.sub(r'[^\d+]', '', data)
+        return bool(re.match(r'^\+?[\d\s\-\(\)]{7,15}$', data)) and len(clean_phone.replace('+', '')) >= 7
+    return True
+
+
+def make_rows(rows, data_type, seed=0):
+    rng = random.Random(seed)
+    if data_type == "url":
+        samples = ["https://example.com/item/{}", "http://localhost:8080/{}", "ftp://bad/{}", "https://10.0.0.{}/", ""]
+    elif data_type == "phone":
+        samples = ["+1 (555) 010-{:04d}", "555-{:04d}", "12{}", "abc{}", ""]
+    else:
+        samples = ["Ticket #{}", "  ", "Hello {}"]
+    return [rng.choice(samples).format(i % 10000) for i in range(rows)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-item cost of bulk QR payload validation")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--legacy-rows", type=int, default=100_000,
+                        help="rows for the per-call baseline (it is slow, so a sample is timed)")
+    args = parser.parse_args()
+
+    for data_type in ("text", "url", "phone"):
+        payloads = make_rows(args.rows, data_type)
+
+        start = time.perf_counter()
+        codes = validate_batch(payloads, data_type)
+        batch_time = time.perf_counter() - start
+
+        sample = payloads[:args.legacy_rows]
+        start = time.perf_counter()
+        legacy = [legacy_validate(p, data_type) for p in sample]
+        legacy_time = time.perf_counter() - start
+
+        mismatches = sum((code == OK) != ok for code, ok in zip(codes, legacy))
+        valid = sum(code == OK for code in codes)
+        print(
+            f"{data_type:>5}: {args.rows:,} rows, {valid:,} valid | "
+            f"batch {batch_time * 1e9 / args.rows:8.1f} ns/item | "
+            f"legacy {legacy_time * 1e9 / len(sample):8.1f} ns/item | "
+            f"mismatches {mismatches}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,9 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import qrcode
-from PIL import Image, ImageTk
-import re
 import os
-import base64
-from io import BytesIO
+
+from qr_core import prepare_payload, build_qr, render_image
+from qr_validation import OK, validate_payload, error_message
 
 class QRCodeGenerator:
     def __init__(self, root):
@@ -30,6 +28,7 @@ class QRCodeGenerator:
         self.data_type = tk.StringVar(value="text")
         self.input_data = tk.StringVar()
         self.qr_image = None
+        self.qr_matrix = None
         self.selected_image_path = ""
         
         self.setup_ui()
@@ -265,34 +264,11 @@ class QRCodeGenerator:
             )
     
     def validate_data(self, data, data_type):
-        if not data.strip() and data_type != "image":
-            return False, "Please enter some data"
-        
-        if data_type == "url":
-            url_pattern = re.compile(
-                r'^https?://'  # http:// or https://
-                r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|'  # domain...
-                r'localhost|'  # localhost...
-                r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  # ...or ip
-                r'(?::\d+)?'  # optional port
-                r'(?:/?|[/?]\S+)$', re.IGNORECASE)
-            
-            if not url_pattern.match(data.strip()):
-                return False, "Please enter a valid URL (must start with http:// or https://)"
-        
-        elif data_type == "phone":
-            # Remove all non-digit characters except + for international numbers
-            clean_phone = re.sub(r'[^\d+]', '', data)
-            
-            # Check if it's a valid phone number format
-            if not re.match(r'^\+?[\d\s\-\(\)]{7,15}$', data) or len(clean_phone.replace('+', '')) < 7:
-                return False, "Please enter a valid phone number (7-15 digits)"
-        
-        elif data_type == "image":
-            if not self.selected_image_path or not os.path.exists(self.selected_image_path):
-                return False, "Please select a valid image file"
+        if data_type == "image":
+            data = self.selected_image_path
         
-        return True, "Valid data"
+        code = validate_payload(data, data_type)
+        return code == OK, error_message(code)
     
     def generate_qr(self):
         try:
@@ -311,30 +287,18 @@ class QRCodeGenerator:
                 messagebox.showerror("Invalid Data", message)
                 return
             
+            # PIL and qrcode are loaded here on first use so the window opens sooner
+            from PIL import Image, ImageTk
+
             # Prepare data for QR code
-            if data_type == "phone":
-                qr_data = f"tel:{data}"
-            elif data_type == "image":
-                # Convert image to base64
-                with open(data, "rb") as img_file:
-                    img_data = base64.b64encode(img_file.read()).decode('utf-8')
-                    qr_data = f"data:image;base64,{img_data}"
-            else:
-                qr_data = data
+            qr_data = prepare_payload(data, data_type)
             
             # Generate QR code
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_L,
-                box_size=10,
-                border=4,
-            )
-            
-            qr.add_data(qr_data)
-            qr.make(fit=True)
+            qr = build_qr(qr_data)
+            self.qr_matrix = qr.get_matrix()
             
             # Create QR code image
-            self.qr_image = qr.make_image(fill_color="black", back_color="white")
+            self.qr_image = render_image(qr)
             
             # Resize for display
             display_size = (350, 350)
@@ -364,13 +328,24 @@ class QRCodeGenerator:
         if self.qr_image:
             file_path = filedialog.asksaveasfilename(
                 defaultextension=".png",
-                filetypes=[("PNG files", "*.png"), ("All files", "*.*")],
+                filetypes=[
+                    ("PNG files", "*.png"),
+                    ("SVG files", "*.svg"),
+                    ("PDF files", "*.pdf"),
+                    ("All files", "*.*")
+                ],
                 title="Save QR Code"
             )
             
             if file_path:
                 try:
-                    self.qr_image.save(file_path)
+                    from qr_vector import save_vector
+
+                    # Vector formats are written from the module matrix
+                    if os.path.splitext(file_path)[1].lower() in (".svg", ".pdf"):
+                        save_vector(self.qr_matrix, file_path)
+                    else:
+                        self.qr_image.save(file_path)
                     self.status_label.config(
                         text=f"QR code saved to {os.path.basename(file_path)}",
                         fg=self.success_color
@@ -0,0 +1,40 @@
+import base64
+
+
+def prepare_payload(data, data_type):
+    """Turn validated user input into the string that gets encoded"""
+    if data_type == "phone":
+        return f"tel:{data}"
+    if data_type == "image":
+        # Convert image to base64
+        with open(data, "rb") as img_file:
+            img_data = base64.b64encode(img_file.read()).decode('utf-8')
+        return f"data:image;base64,{img_data}"
+    return data
+
+
+def build_qr(qr_data, error_correction=None, box_size=10, border=4):
+    """Encode qr_data into a fitted QRCode object (error correction L unless given)"""
+    # Imported on first use: qrcode is the bulk of a cold start
+    import qrcode
+
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L if error_correction is None else error_correction,
+        box_size=box_size,
+        border=border,
+    )
+    qr.add_data(qr_data)
+    qr.make(fit=True)
+    return qr
+
+
+def render_image(qr):
+    """Render a QRCode object to a black-on-white PIL image"""
+    return qr.make_image(fill_color="black", back_color="white")
+
+
+def read_payloads(path):
+    """(line number, payload) for every non-empty line of a payload file"""
+    with open(path, encoding="utf-8") as f:
+        return [(number, line.rstrip("\r\n")) for number, line in enumerate(f, 1) if line.strip()]
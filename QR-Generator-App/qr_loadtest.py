@@ -0,0 +1,67 @@
+import argparse
+import json
+import threading
+import time
+from urllib.parse import urlencode
+from urllib.request import urlopen
+
+
+def worker(base_url, requests, unique, fmt, offset, latencies, errors, lock):
+    for i in range(requests):
+        query = urlencode({"data": f"https://example.com/item/{(offset + i) % unique}", "type": "url", "format": fmt})
+        start = time.perf_counter()
+        try:
+            with urlopen(f"{base_url}/qr?{query}") as response:
+                response.read()
+            ok = True
+        except Exception:
+            ok = False
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            if not ok:
+                errors.append(elapsed)
+
+
+def percentile(values, p):
+    return values[min(len(values) - 1, int(p / 100 * len(values)))] * 1000 if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for qr_service.py")
+    parser.add_argument("--url", default="http://127.0.0.1:8765")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="requests per client")
+    parser.add_argument("--unique", type=int, default=1000, help="distinct payloads (lower = more cache hits)")
+    parser.add_argument("--format", default="png", choices=["png", "svg"])
+    args = parser.parse_args()
+
+    latencies, errors = [], []
+    lock = threading.Lock()
+    threads = [
+        threading.Thread(
+            target=worker,
+            args=(args.url, args.requests, args.unique, args.format, n * args.requests, latencies, errors, lock),
+        )
+        for n in range(args.clients)
+    ]
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"{len(latencies)} requests from {args.clients} clients in {elapsed:.2f}s "
+          f"({len(latencies) / elapsed:.1f} req/s), {len(errors)} errors")
+    print(f"latency ms: p50 {percentile(latencies, 50):.1f}  p95 {percentile(latencies, 95):.1f}  "
+          f"p99 {percentile(latencies, 99):.1f}")
+
+    with urlopen(f"{args.url}/metrics") as response:
+        print("server metrics:", json.dumps(json.load(response), indent=2))
+
+
+if __name__ == "__main__":
+    main()
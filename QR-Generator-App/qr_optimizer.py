@@ -0,0 +1,214 @@
+import argparse
+
+import qrcode
+from qrcode import util
+
+# Strongest first: the optimizer keeps the best error correction that still fits
+ERROR_LEVELS = [
+    ("H", qrcode.constants.ERROR_CORRECT_H),
+    ("Q", qrcode.constants.ERROR_CORRECT_Q),
+    ("M", qrcode.constants.ERROR_CORRECT_M),
+    ("L", qrcode.constants.ERROR_CORRECT_L),
+]
+LEVEL_NAMES = {level: name for name, level in ERROR_LEVELS}
+
+MODES = (util.MODE_NUMBER, util.MODE_ALPHA_NUM, util.MODE_8BIT_BYTE)
+# Per-character cost in sixths of a bit: numeric 10/3, alphanumeric 11/2, byte 8
+CHAR_COST = {util.MODE_NUMBER: 20, util.MODE_ALPHA_NUM: 33, util.MODE_8BIT_BYTE: 48}
+DIGITS = frozenset(b"0123456789")
+ALPHA_NUM = frozenset(util.ALPHA_NUM)
+
+# Character count field widths change at these version boundaries
+VERSION_CLASSES = [(1, 9), (10, 26), (27, 40)]
+
+
+def modules_for_version(version):
+    return 17 + 4 * version
+
+
+def segment(data, version):
+    """Split data into numeric/alphanumeric/byte chunks with the fewest bits.
+
+    Dynamic programming over the UTF-8 bytes: for each position we keep the
+    cheapest way to end in each mode, paying a mode header plus character
+    count field whenever the encoding switches mode.
+    """
+    data = util.to_bytestring(data)
+    if not data:
+        return [util.QRData(data, mode=util.MODE_8BIT_BYTE, check_data=False)]
+
+    count_bits = util.mode_sizes_for_version(version)
+    head_cost = {mode: (4 + count_bits[mode]) * 6 for mode in MODES}
+    prev_cost = dict(head_cost)
+    char_modes = []
+
+    for byte in data:
+        cur_cost = {}
+        cur_from = {}
+        cur_cost[util.MODE_8BIT_BYTE] = prev_cost[util.MODE_8BIT_BYTE] + CHAR_COST[util.MODE_8BIT_BYTE]
+        cur_from[util.MODE_8BIT_BYTE] = util.MODE_8BIT_BYTE
+        if byte in ALPHA_NUM:
+            cur_cost[util.MODE_ALPHA_NUM] = prev_cost[util.MODE_ALPHA_NUM] + CHAR_COST[util.MODE_ALPHA_NUM]
+            cur_from[util.MODE_ALPHA_NUM] = util.MODE_ALPHA_NUM
+        if byte in DIGITS:
+            cur_cost[util.MODE_NUMBER] = prev_cost[util.MODE_NUMBER] + CHAR_COST[util.MODE_NUMBER]
+            cur_from[util.MODE_NUMBER] = util.MODE_NUMBER
+
+        # Allow switching to another mode right after this character
+        ended = dict(cur_cost)
+        for to_mode in MODES:
+            for from_mode, cost in ended.items():
+                switch_cost = -(-cost // 6) * 6 + head_cost[to_mode]
+                if to_mode not in cur_cost or switch_cost < cur_cost[to_mode]:
+                    cur_cost[to_mode] = switch_cost
+                    cur_from[to_mode] = from_mode
+        char_modes.append(cur_from)
+        prev_cost = cur_cost
+
+    # Walk back from the cheapest final state
+    mode = min(prev_cost, key=prev_cost.get)
+    modes = [0] * len(data)
+    for i in range(len(data) - 1, -1, -1):
+        mode = char_modes[i][mode]
+        modes[i] = mode
+
+    chunks = []
+    start = 0
+    for i in range(1, len(data) + 1):
+        if i == len(data) or modes[i] != modes[start]:
+            chunks.append(util.QRData(data[start:i], mode=modes[start], check_data=False))
+            start = i
+    return chunks
+
+
+def needed_bits(chunks, version):
+    count_bits = util.mode_sizes_for_version(version)
+    buffer = util.BitBuffer()
+    for chunk in chunks:
+        buffer.put(chunk.mode, 4)
+        buffer.put(len(chunk), count_bits[chunk.mode])
+        chunk.write(buffer)
+    return len(buffer)
+
+
+def smallest_version(data, error_correction, max_version=40):
+    """(version, chunks) of the smallest code for this level, or None"""
+    limits = util.BIT_LIMIT_TABLE[error_correction]
+    for first, last in VERSION_CLASSES:
+        if first > max_version:
+            break
+        chunks = segment(data, first)
+        bits = needed_bits(chunks, first)
+        for version in range(first, min(last, max_version) + 1):
+            if bits <= limits[version]:
+                return version, chunks
+    return None
+
+
+class QRPlan:
+    """Chosen version, error correction and segmentation for one payload"""
+
+    def __init__(self, version, error_correction, chunks, border=4, box_size=10):
+        self.version = version
+        self.error_correction = error_correction
+        self.chunks = chunks
+        self.border = border
+        self.box_size = box_size
+
+    @property
+    def modules(self):
+        return modules_for_version(self.version)
+
+    @property
+    def total_modules(self):
+        return self.modules + 2 * self.border
+
+    @property
+    def pixel_size(self):
+        return self.total_modules * self.box_size
+
+    @property
+    def level_name(self):
+        return LEVEL_NAMES[self.error_correction]
+
+    @property
+    def mode_names(self):
+        names = {util.MODE_NUMBER: "numeric", util.MODE_ALPHA_NUM: "alphanumeric", util.MODE_8BIT_BYTE: "byte"}
+        return [(names[chunk.mode], len(chunk)) for chunk in self.chunks]
+
+    def build(self):
+        qr = qrcode.QRCode(
+            version=self.version,
+            error_correction=self.error_correction,
+            box_size=self.box_size,
+            border=self.border,
+        )
+        for chunk in self.chunks:
+            qr.add_data(chunk)
+        qr.make(fit=False)
+        return qr
+
+    def describe(self):
+        segments = ", ".join(f"{name}x{length}" for name, length in self.mode_names)
+        return (
+            f"version {self.version} ({self.modules}x{self.modules} modules, "
+            f"{self.total_modules} with border), EC {self.level_name}, "
+            f"{self.pixel_size}px at box size {self.box_size}, segments: {segments}"
+        )
+
+
+def optimize(data, max_version=None, max_pixels=None, border=4, box_size=10, min_box_size=1):
+    """Pick segmentation, version and the strongest error correction that fits.
+
+    With max_version or max_pixels the strongest level fitting that target is
+    chosen; max_pixels also picks the largest box size that stays inside it.
+    Without a target the code is kept at the smallest version reachable with
+    ERROR_CORRECT_L, and error correction is raised as far as that allows.
+    """
+    if max_pixels is not None:
+        # Largest version whose modules still get min_box_size pixels each
+        limit = (max_pixels // min_box_size - 2 * border - 17) // 4
+        if limit < 1:
+            raise ValueError(f"{max_pixels}px is too small for any QR code at box size {min_box_size}")
+        max_version = min(limit, max_version or 40)
+
+    if max_version is None:
+        smallest = smallest_version(data, qrcode.constants.ERROR_CORRECT_L)
+        if smallest is None:
+            raise ValueError("Data is too long to fit in a QR code")
+        max_version = smallest[0]
+
+    for _, level in ERROR_LEVELS:
+        fit = smallest_version(data, level, max_version)
+        if fit is not None:
+            version, chunks = fit
+            plan = QRPlan(version, level, chunks, border, box_size)
+            if max_pixels is not None:
+                plan.box_size = max(min_box_size, max_pixels // plan.total_modules)
+            return plan
+    raise ValueError(f"Data does not fit in version {max_version} even with error correction L")
+
+
+def build_optimized_qr(data, **options):
+    return optimize(data, **options).build()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find the smallest QR code and strongest error correction for a payload")
+    parser.add_argument("data")
+    parser.add_argument("--max-version", type=int)
+    parser.add_argument("--max-pixels", type=int)
+    parser.add_argument("--border", type=int, default=4)
+    args = parser.parse_args()
+
+    plan = optimize(args.data, max_version=args.max_version, max_pixels=args.max_pixels, border=args.border)
+    print(plan.describe())
+
+    baseline = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_L, border=args.border)
+    baseline.add_data(args.data)
+    baseline.make(fit=True)
+    print(f"default build_qr: version {baseline.version} ({modules_for_version(baseline.version)} modules), EC L")
+
+
+if __name__ == "__main__":
+    main()
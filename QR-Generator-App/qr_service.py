@@ -0,0 +1,363 @@
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from urllib.parse import parse_qs, urlparse
+
+from qr_core import build_qr, prepare_payload, render_image
+from qr_validation import OK, error_message, validate_payload
+from qr_vector import qr_to_svg
+
+CONTENT_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+
+
+class PayloadError(ValueError):
+    """The payload cannot be encoded, e.g. it is too long for any QR version"""
+
+
+def render_payload(payload, fmt):
+    from qrcode.exceptions import DataOverflowError
+
+    try:
+        qr = build_qr(payload)
+    except (DataOverflowError, ValueError) as e:
+        raise PayloadError(f"Payload does not fit in a QR code: {e}") from None
+    if fmt == "svg":
+        return qr_to_svg(qr.get_matrix()).encode("utf-8")
+    buffer = BytesIO()
+    render_image(qr).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def render_batch(items):
+    # Runs in a worker process: one round trip for a whole micro-batch. A
+    # failing item is returned as its exception so it only fails its own requests.
+    results = []
+    for payload, fmt in items:
+        try:
+            results.append(render_payload(payload, fmt))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+class RenderCache:
+    """Thread-safe LRU cache of rendered images keyed by (payload, format)"""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            body = self._items.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key, body):
+        with self._lock:
+            self._items[key] = body
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def __len__(self):
+        return len(self._items)
+
+
+class Metrics:
+    """Request latency, batch sizes and queue depth for the /metrics endpoint"""
+
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.batched_items = 0
+        self.max_queue_depth = 0
+
+    def record_request(self, seconds, ok=True):
+        with self._lock:
+            self.requests += 1
+            if not ok:
+                self.errors += 1
+            self._latencies.append(seconds)
+
+    def record_batch(self, size, queue_depth):
+        with self._lock:
+            self.batches += 1
+            self.batched_items += size
+            self.max_queue_depth = max(self.max_queue_depth, queue_depth)
+
+    def snapshot(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            requests, errors = self.requests, self.errors
+            batches, batched_items = self.batches, self.batched_items
+            max_queue_depth = self.max_queue_depth
+
+        def percentile(p):
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000
+
+        return {
+            "requests": requests,
+            "errors": errors,
+            "batches": batches,
+            "mean_batch_size": batched_items / batches if batches else 0.0,
+            "max_queue_depth": max_queue_depth,
+            "latency_ms": {"p50": percentile(50), "p95": percentile(95), "p99": percentile(99)},
+        }
+
+
+class MicroBatcher:
+    """Collects concurrent render requests into batches for a process pool.
+
+    The dispatcher waits for the first request, then keeps collecting for up
+    to batch_window seconds or until max_batch requests are queued. At most
+    one batch per worker is in the pool at a time; while they are all busy
+    requests wait here, where they merge into larger batches. Identical
+    requests inside a batch are rendered once, and finished images go into the
+    shared cache before waiting requests are released.
+    """
+
+    def __init__(self, cache, metrics, workers=None, max_batch=32, batch_window=0.005):
+        self.cache = cache
+        self.metrics = metrics
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        workers = workers or os.cpu_count() or 1
+        self._queue = queue.Queue()
+        self._slots = threading.Semaphore(workers)
+        self._pending = 0  # requests submitted and not yet resolved
+        self._pending_lock = threading.Lock()
+        self._pool = ProcessPoolExecutor(max_workers=workers)
+        self._thread = threading.Thread(target=self._dispatch, daemon=True)
+        self._thread.start()
+
+    @property
+    def queue_depth(self):
+        """Requests waiting for a batch or being rendered in the pool"""
+        return self._pending
+
+    def _add_pending(self, count):
+        with self._pending_lock:
+            self._pending += count
+            return self._pending
+
+    def submit(self, payload, fmt):
+        key = (payload, fmt)
+        future = Future()
+        body = self.cache.get(key)
+        if body is not None:
+            future.set_result(body)
+        else:
+            self._add_pending(1)
+            self._queue.put((key, future))
+        return future
+
+    def _dispatch(self):
+        while True:
+            # Wait for a free worker first, so the queue can build up into a batch
+            self._slots.acquire()
+            jobs = [self._queue.get()]
+            if jobs[0] is None:
+                return
+            deadline = time.perf_counter() + self.batch_window
+            while len(jobs) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    job = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if job is None:
+                    self._queue.put(None)
+                    break
+                jobs.append(job)
+
+            waiting = OrderedDict()
+            for key, future in jobs:
+                waiting.setdefault(key, []).append(future)
+            self.metrics.record_batch(len(jobs), self._pending)
+
+            keys = list(waiting)
+            batch = self._pool.submit(render_batch, keys)
+            batch.add_done_callback(lambda done, keys=keys, waiting=waiting: self._resolve(done, keys, waiting))
+
+    def _resolve(self, done, keys, waiting):
+        self._slots.release()
+        self._add_pending(-sum(len(futures) for futures in waiting.values()))
+        try:
+            bodies = done.result()
+        except Exception as e:
+            # The worker itself failed (e.g. it was killed): every request in the batch fails
+            bodies = [e] * len(keys)
+        for key, body in zip(keys, bodies):
+            if isinstance(body, Exception):
+                for future in waiting[key]:
+                    future.set_exception(body)
+                continue
+            self.cache.put(key, body)
+            for future in waiting[key]:
+                future.set_result(body)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        self._pool.shutdown()
+
+
+class QRRequestHandler(BaseHTTPRequestHandler):
+    server_version = "QRService/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/metrics":
+            self._send_json(200, self.server.metrics_snapshot())
+        elif url.path == "/qr":
+            params = {name: values[0] for name, values in parse_qs(url.query).items()}
+            self._handle_qr(params)
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/qr":
+            self._send_json(404, {"error": "Not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            params = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": "Body must be JSON"})
+            self.server.metrics.record_request(0.0, ok=False)
+            return
+        if not isinstance(params, dict):
+            self._send_json(400, {"error": "Body must be a JSON object"})
+            self.server.metrics.record_request(0.0, ok=False)
+            return
+        self._handle_qr(params)
+
+    def _handle_qr(self, params):
+        start = time.perf_counter()
+        data = params.get("data", "")
+        data_type = params.get("type", "text")
+        fmt = params.get("format", "png")
+
+        # JSON bodies can carry any type; the GET query string only strings
+        bad_fields = [name for name, value in (("data", data), ("type", data_type), ("format", fmt))
+                      if not isinstance(value, str)]
+        if bad_fields:
+            self._send_json(400, {"error": f"Fields must be strings: {', '.join(bad_fields)}"})
+            self.server.metrics.record_request(time.perf_counter() - start, ok=False)
+            return
+        fmt = fmt.lower()
+
+        if fmt not in CONTENT_TYPES:
+            self._send_json(400, {"error": f"Unsupported format: {fmt}"})
+        elif data_type == "image":
+            self._send_json(400, {"error": "Image payloads are only supported in the desktop app"})
+        else:
+            code = validate_payload(data, data_type)
+            if code != OK:
+                self._send_json(400, {"error": error_message(code), "code": code})
+            else:
+                try:
+                    body = self.server.batcher.submit(prepare_payload(data, data_type), fmt).result(
+                        timeout=self.server.render_timeout
+                    )
+                except PayloadError as e:
+                    self._send_json(400, {"error": str(e)})
+                    self.server.metrics.record_request(time.perf_counter() - start, ok=False)
+                    return
+                except Exception as e:
+                    self._send_json(500, {"error": f"Error generating QR code: {e}"})
+                    self.server.metrics.record_request(time.perf_counter() - start, ok=False)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPES[fmt])
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                self.server.metrics.record_request(time.perf_counter() - start)
+                return
+        self.server.metrics.record_request(time.perf_counter() - start, ok=False)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class QRServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, workers=None, max_batch=32, batch_window=0.005, cache_size=1024, render_timeout=30):
+        super().__init__(address, QRRequestHandler)
+        self.cache = RenderCache(cache_size)
+        self.metrics = Metrics()
+        self.batcher = MicroBatcher(self.cache, self.metrics, workers, max_batch, batch_window)
+        self.render_timeout = render_timeout
+
+    def metrics_snapshot(self):
+        snapshot = self.metrics.snapshot()
+        snapshot["queue_depth"] = self.batcher.queue_depth
+        snapshot["cache"] = {"entries": len(self.cache), "hits": self.cache.hits, "misses": self.cache.misses}
+        return snapshot
+
+    def server_close(self):
+        super().server_close()
+        self.batcher.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local HTTP service that renders QR codes as PNG or SVG")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, help="render processes (default: CPU count)")
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--batch-window-ms", type=float, default=5.0)
+    parser.add_argument("--cache-size", type=int, default=1024)
+    args = parser.parse_args()
+
+    server = QRServer(
+        (args.host, args.port),
+        workers=args.workers,
+        max_batch=args.max_batch,
+        batch_window=args.batch_window_ms / 1000,
+        cache_size=args.cache_size,
+    )
+    print(f"QR service listening on http://{args.host}:{args.port}")
+    print("GET /qr?data=...&type=text|url|phone&format=png|svg, POST /qr (JSON), GET /metrics")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
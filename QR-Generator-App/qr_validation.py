@@ -0,0 +1,106 @@
+import os
+import re
+
+# Error codes returned per row by validate_batch
+OK = 0
+EMPTY = 1
+INVALID_URL = 2
+INVALID_PHONE = 3
+INVALID_IMAGE = 4
+UNKNOWN_TYPE = 5
+
+MESSAGES = {
+    OK: "Valid data",
+    EMPTY: "Please enter some data",
+    INVALID_URL: "Please enter a valid URL (must start with http:// or https://)",
+    INVALID_PHONE: "Please enter a valid phone number (7-15 digits)",
+    INVALID_IMAGE: "Please select a valid image file",
+    UNKNOWN_TYPE: "Unknown data type",
+}
+
+# Compiled once at import instead of on every call
+URL_PATTERN = re.compile(
+    r'^https?://'  # http:// or https://
+    r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|'  # domain...
+    r'localhost|'  # localhost...
+    r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  # ...or ip
+    r'(?::\d+)?'  # optional port
+    r'(?:/?|[/?]\S+)$', re.IGNORECASE)
+PHONE_PATTERN = re.compile(r'^\+?[\d\s\-\(\)]{7,15}$')
+NON_DIGIT_PATTERN = re.compile(r'\D')
+
+MIN_PHONE_DIGITS = 7
+
+
+def _check_url(data):
+    data = data.strip()
+    if not data:
+        return EMPTY
+    return OK if URL_PATTERN.match(data) else INVALID_URL
+
+
+def _check_phone(data):
+    if not data.strip():
+        return EMPTY
+    # Only digits, spaces, dashes and brackets with an optional leading +,
+    # and at least 7 actual digits once the formatting is stripped
+    if not PHONE_PATTERN.match(data) or len(NON_DIGIT_PATTERN.sub('', data)) < MIN_PHONE_DIGITS:
+        return INVALID_PHONE
+    return OK
+
+
+def _check_text(data):
+    return OK if data.strip() else EMPTY
+
+
+def _check_image(data):
+    return OK if data and os.path.exists(data) else INVALID_IMAGE
+
+
+CHECKS = {
+    "text": _check_text,
+    "url": _check_url,
+    "phone": _check_phone,
+    "image": _check_image,
+}
+
+
+def validate_payload(data, data_type):
+    """Validate one payload, returning an error code (OK == 0)"""
+    check = CHECKS.get(data_type)
+    if check is None:
+        return UNKNOWN_TYPE
+    return check(data)
+
+
+def validate_batch(payloads, data_type):
+    """Validate a whole column of payloads, returning one error code per row.
+
+    data_type is either a single type applied to every row or a sequence of
+    per-row types of the same length. Rows sharing a type are checked in one
+    tight pass with the precompiled patterns.
+    """
+    if isinstance(data_type, str):
+        check = CHECKS.get(data_type)
+        if check is None:
+            return [UNKNOWN_TYPE] * len(payloads)
+        return list(map(check, payloads))
+
+    if len(data_type) != len(payloads):
+        raise ValueError("payloads and data_type must have the same length")
+
+    codes = [UNKNOWN_TYPE] * len(payloads)
+    groups = {}
+    for index, row_type in enumerate(data_type):
+        groups.setdefault(row_type, []).append(index)
+    for row_type, indexes in groups.items():
+        check = CHECKS.get(row_type)
+        if check is None:
+            continue
+        for index, code in zip(indexes, map(check, [payloads[i] for i in indexes])):
+            codes[index] = code
+    return codes
+
+
+def error_message(code):
+    return MESSAGES.get(code, MESSAGES[UNKNOWN_TYPE])
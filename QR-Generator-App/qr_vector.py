@@ -0,0 +1,276 @@
+import argparse
+import os
+import zlib
+
+from qr_core import build_qr, read_payloads, render_image
+from qr_optimizer import build_optimized_qr
+
+SVG_NS = "http://www.w3.org/2000/svg"
+
+
+def merged_rects(matrix):
+    """Merge dark modules into rectangles (x, y, w, h) in module units.
+
+    Horizontal runs of dark modules are found per row and stacked downwards
+    for as long as the next row has the exact same run, so solid blocks like
+    finder patterns collapse into a handful of rectangles.
+    """
+    rects = []
+    open_rects = {}  # (x, w) -> [x, y, w, h]
+    for y, row in enumerate(matrix):
+        runs = set()
+        x = 0
+        n = len(row)
+        while x < n:
+            if row[x]:
+                start = x
+                while x < n and row[x]:
+                    x += 1
+                runs.add((start, x - start))
+            else:
+                x += 1
+
+        for key in list(open_rects):
+            if key not in runs:
+                rects.append(tuple(open_rects.pop(key)))
+        for key in runs:
+            if key in open_rects:
+                open_rects[key][3] += 1
+            else:
+                open_rects[key] = [key[0], y, key[1], 1]
+
+    rects.extend(tuple(rect) for rect in open_rects.values())
+    rects.sort(key=lambda rect: (rect[1], rect[0]))
+    return rects
+
+
+def svg_path_data(matrix):
+    """Single SVG path (module units) covering every dark module"""
+    return "".join(f"M{x} {y}h{w}v{h}h-{w}z" for x, y, w, h in merged_rects(matrix))
+
+
+def qr_to_svg(matrix, module_size=10):
+    """Standalone SVG document for one QR matrix"""
+    n = len(matrix)
+    size = n * module_size
+    return (
+        f'<svg xmlns="{SVG_NS}" width="{size}" height="{size}" '
+        f'viewBox="0 0 {n} {n}" shape-rendering="crispEdges">'
+        f'<rect width="{n}" height="{n}" fill="#fff"/>'
+        f'<path d="{svg_path_data(matrix)}" fill="#000"/>'
+        f'</svg>\n'
+    )
+
+
+def pdf_content(matrix, module_size):
+    """PDF page content stream filling every dark module in black"""
+    n = len(matrix)
+    ops = ["0 0 0 rg"]
+    for x, y, w, h in merged_rects(matrix):
+        # PDF origin is bottom-left, QR rows count from the top
+        ops.append(
+            f"{x * module_size:g} {(n - y - h) * module_size:g} "
+            f"{w * module_size:g} {h * module_size:g} re"
+        )
+    ops.append("f")
+    return "\n".join(ops).encode("ascii")
+
+
+class PdfStreamWriter:
+    """Multi-page PDF writer that flushes each QR code page as it is added.
+
+    Only the byte offsets of written objects are kept in memory, so print runs
+    of thousands of codes never hold more than one page at a time.
+    """
+
+    CATALOG_ID = 1
+    PAGES_ID = 2
+
+    def __init__(self, file_path, module_size=4):
+        self.module_size = module_size
+        self._file = open(file_path, "wb")
+        self._offsets = {}
+        self._page_ids = []
+        self._next_id = 3
+        self._file.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def count(self):
+        return len(self._page_ids)
+
+    def _write_object(self, obj_id, body):
+        self._offsets[obj_id] = self._file.tell()
+        self._file.write(f"{obj_id} 0 obj\n".encode("ascii"))
+        self._file.write(body)
+        self._file.write(b"\nendobj\n")
+
+    def add(self, matrix):
+        content = zlib.compress(pdf_content(matrix, self.module_size))
+        size = len(matrix) * self.module_size
+        content_id = self._next_id
+        page_id = self._next_id + 1
+        self._next_id += 2
+
+        self._write_object(
+            content_id,
+            f"<< /Length {len(content)} /Filter /FlateDecode >>\nstream\n".encode("ascii")
+            + content
+            + b"\nendstream",
+        )
+        self._write_object(
+            page_id,
+            (
+                f"<< /Type /Page /Parent {self.PAGES_ID} 0 R "
+                f"/MediaBox [0 0 {size:g} {size:g}] "
+                f"/Contents {content_id} 0 R /Resources << >> >>"
+            ).encode("ascii"),
+        )
+        self._page_ids.append(page_id)
+
+    def close(self):
+        if self._file.closed:
+            return
+        kids = " ".join(f"{page_id} 0 R" for page_id in self._page_ids)
+        self._write_object(
+            self.PAGES_ID,
+            f"<< /Type /Pages /Kids [{kids}] /Count {len(self._page_ids)} >>".encode("ascii"),
+        )
+        self._write_object(
+            self.CATALOG_ID,
+            f"<< /Type /Catalog /Pages {self.PAGES_ID} 0 R >>".encode("ascii"),
+        )
+
+        xref_offset = self._file.tell()
+        self._file.write(f"xref\n0 {self._next_id}\n".encode("ascii"))
+        self._file.write(b"0000000000 65535 f \n")
+        for obj_id in range(1, self._next_id):
+            self._file.write(f"{self._offsets[obj_id]:010d} 00000 n \n".encode("ascii"))
+        self._file.write(
+            (
+                f"trailer\n<< /Size {self._next_id} /Root {self.CATALOG_ID} 0 R >>\n"
+                f"startxref\n{xref_offset}\n%%EOF\n"
+            ).encode("ascii")
+        )
+        self._file.close()
+
+
+class SvgSpriteWriter:
+    """SVG sprite writer: one <symbol> per QR code, streamed to disk as added.
+
+    Each symbol is module_size units per module; a <use> without its own
+    width/height renders at that size.
+    """
+
+    def __init__(self, file_path, module_size=10, id_prefix="qr-"):
+        self.module_size = module_size
+        self.id_prefix = id_prefix
+        self.count = 0
+        self._file = open(file_path, "w", encoding="utf-8")
+        self._file.write(f'<svg xmlns="{SVG_NS}" style="display:none">\n')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def add(self, matrix, symbol_id=None):
+        if symbol_id is None:
+            symbol_id = f"{self.id_prefix}{self.count}"
+        n = len(matrix)
+        size = n * self.module_size
+        self._file.write(
+            f'<symbol id="{symbol_id}" width="{size:g}" height="{size:g}" viewBox="0 0 {n} {n}" '
+            f'shape-rendering="crispEdges">'
+            f'<rect width="{n}" height="{n}" fill="#fff"/>'
+            f'<path d="{svg_path_data(matrix)}" fill="#000"/></symbol>\n'
+        )
+        self.count += 1
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._file.write("</svg>\n")
+        self._file.close()
+
+
+def open_writer(file_path, module_size=None):
+    """Pick a streaming writer from the file extension (.pdf or .svg)"""
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext == ".pdf":
+        return PdfStreamWriter(file_path, module_size or 4)
+    if ext == ".svg":
+        return SvgSpriteWriter(file_path, module_size or 10)
+    raise ValueError(f"Unsupported vector format: {ext or file_path}")
+
+
+def save_vector(matrix, file_path, module_size=None):
+    """Save a single QR matrix as a standalone .svg or one-page .pdf"""
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext == ".svg":
+        with open(file_path, "w", encoding="utf-8") as f:
+            f.write(qr_to_svg(matrix, module_size or 10))
+    elif ext == ".pdf":
+        with PdfStreamWriter(file_path, module_size or 4) as writer:
+            writer.add(matrix)
+    else:
+        raise ValueError(f"Unsupported vector format: {ext or file_path}")
+
+
+def write_batch(payloads, file_path, module_size=None, border=4, verifier=None, optimize=False, lines=None):
+    """Encode payloads one at a time and stream them into a single file.
+
+    If a qr_verify.VerificationStage is passed, each code is also rendered and
+    queued for a round-trip decode while the next one is being encoded. With
+    optimize=True every code gets the smallest version and strongest error
+    correction that fits (see qr_optimizer). `lines` optionally gives the
+    source line number of each payload for the verification report.
+    """
+    build = build_optimized_qr if optimize else build_qr
+    lines = iter(lines) if lines is not None else None
+    with open_writer(file_path, module_size) as writer:
+        for payload in payloads:
+            qr = build(payload, border=border)
+            writer.add(qr.get_matrix())
+            line = next(lines) if lines is not None else None
+            if verifier is not None:
+                verifier.submit(payload, render_image(qr), line)
+        return writer.count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write QR codes for a print run as PDF pages or an SVG sprite")
+    parser.add_argument("payloads", help="text file with one payload per line")
+    parser.add_argument("output", help="output .pdf or .svg file")
+    parser.add_argument("--module-size", type=float, help="module size (PDF points or SVG pixels)")
+    parser.add_argument("--border", type=int, default=4, help="quiet zone in modules")
+    parser.add_argument("--optimize", action="store_true",
+                        help="pick segment modes, version and error correction per code for the smallest output")
+    parser.add_argument("--verify", action="store_true", help="decode every code back and report mismatches")
+    parser.add_argument("--workers", type=int, help="decoder processes for --verify")
+    args = parser.parse_args()
+
+    verifier = None
+    if args.verify:
+        from qr_verify import VerificationStage
+        verifier = VerificationStage(args.workers)
+
+    numbered = read_payloads(args.payloads)
+    count = write_batch([payload for _, payload in numbered], args.output, args.module_size, args.border, verifier,
+                        args.optimize, lines=[line for line, _ in numbered])
+    print(f"Wrote {count} QR codes to {args.output}")
+
+    if verifier is not None:
+        report = verifier.finish()
+        print(report.summary())
+        report.print_failures()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from qr_core import build_qr, read_payloads, render_image
+
+try:
+    import cv2
+    import numpy as np
+except ImportError:  # verification is optional, generation works without it
+    cv2 = None
+    np = None
+
+_decoders = None
+
+
+def _decode(width, height, pixels):
+    # Runs in a worker process; the detectors are reused per process.
+    # QRCodeDetector misreads non-ASCII and some long payloads, so the ArUco
+    # based detector (OpenCV 4.8+) goes first and the classic one is a fallback.
+    global _decoders
+    if _decoders is None:
+        _decoders = [cv2.QRCodeDetector()]
+        if hasattr(cv2, "QRCodeDetectorAruco"):
+            _decoders.insert(0, cv2.QRCodeDetectorAruco())
+    gray = np.frombuffer(pixels, dtype=np.uint8).reshape(height, width)
+    for decoder in _decoders:
+        decoded, _, _ = decoder.detectAndDecode(gray)
+        if decoded:
+            return decoded
+    return None
+
+
+class VerifyReport:
+    """Outcome of a verification run"""
+
+    def __init__(self):
+        self.checked = 0
+        self.failures = []  # (line, expected payload, decoded payload) that decoded to something else
+        self.undecoded = []  # (line, expected payload) where no QR code could be read back
+        self.elapsed = 0.0
+
+    @property
+    def passed(self):
+        return self.checked - len(self.failures) - len(self.undecoded)
+
+    @property
+    def throughput(self):
+        return self.checked / self.elapsed if self.elapsed else 0.0
+
+    def summary(self):
+        return (
+            f"Verified {self.checked} QR codes: {self.passed} passed, {len(self.failures)} mismatched, "
+            f"{len(self.undecoded)} could not be decoded ({self.throughput:.1f} codes/s)"
+        )
+
+    def print_failures(self):
+        for line, expected, decoded in self.failures:
+            print(f"  line {line}: expected {expected!r}, decoded {decoded!r}")
+        for line, expected in self.undecoded:
+            print(f"  line {line}: could not decode {expected!r}")
+
+
+class VerificationStage:
+    """Decode rendered QR images on a process pool while encoding continues.
+
+    submit() hands an image to the pool and returns immediately; only when
+    max_pending decodes are in flight does it wait for the oldest one, which
+    keeps memory bounded on long runs.
+    """
+
+    def __init__(self, workers=None, max_pending=None):
+        if cv2 is None:
+            raise RuntimeError("QR verification needs OpenCV: pip install opencv-python")
+        workers = workers or os.cpu_count() or 1
+        self._pool = ProcessPoolExecutor(max_workers=workers)
+        self._max_pending = max_pending or workers * 4
+        self._pending = deque()
+        self._start = time.perf_counter()
+        self._count = 0
+        self.report = VerifyReport()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.finish()
+
+    def submit(self, payload, image, line=None):
+        """`line` labels the payload in the report; defaults to its 1-based position"""
+        gray = image.convert("L")
+        future = self._pool.submit(_decode, gray.width, gray.height, gray.tobytes())
+        self._count += 1
+        self._pending.append((self._count if line is None else line, payload, future))
+        while len(self._pending) >= self._max_pending:
+            self._collect()
+
+    def _collect(self):
+        line, payload, future = self._pending.popleft()
+        try:
+            decoded = future.result()
+        except Exception:
+            decoded = None
+        self.report.checked += 1
+        if decoded is None:
+            self.report.undecoded.append((line, payload))
+        elif decoded != payload:
+            self.report.failures.append((line, payload, decoded))
+
+    def finish(self):
+        while self._pending:
+            self._collect()
+        self._pool.shutdown()
+        self.report.elapsed = time.perf_counter() - self._start
+        return self.report
+
+
+def verify_payloads(payloads, error_correction=None, workers=None, box_size=10, border=4, lines=None):
+    """Encode, render and round-trip decode every payload.
+
+    `lines` optionally gives the source line number of each payload for the report.
+    """
+    options = {"box_size": box_size, "border": border}
+    if error_correction is not None:
+        options["error_correction"] = error_correction
+    lines = iter(lines) if lines is not None else None
+    with VerificationStage(workers) as stage:
+        for payload in payloads:
+            line = next(lines) if lines is not None else None
+            stage.submit(payload, render_image(build_qr(payload, **options)), line)
+    return stage.report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that generated QR codes decode back to their payloads")
+    parser.add_argument("payloads", help="text file with one payload per line")
+    parser.add_argument("--workers", type=int, help="decoder processes (default: CPU count)")
+    parser.add_argument("--box-size", type=int, default=10)
+    args = parser.parse_args()
+
+    numbered = read_payloads(args.payloads)
+    report = verify_payloads([payload for _, payload in numbered], workers=args.workers, box_size=args.box_size,
+                             lines=[line for line, _ in numbered])
+
+    print(report.summary())
+    report.print_failures()
+
+
+if __name__ == "__main__":
+    main()